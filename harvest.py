@@ -0,0 +1,18 @@
+from __future__ import annotations
+"""Headless harvest runner (no display needed).
+Ensures `./src` is on sys.path so imports work reliably.
+Run with:
+    python harvest.py "query one" "query two" --count 500 --fetch full
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from image_hunter.cli import main  # Import after sys.path adjustment
+
+if __name__ == "__main__":
+    raise SystemExit(main())
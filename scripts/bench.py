@@ -0,0 +1,251 @@
+from __future__ import annotations
+"""Headless benchmarks for the gallery/thumbnail hot paths.
+
+Runs under the offscreen Qt platform against a local HTTP stub server.
+Measures:
+  - ThumbLoader throughput (cold cache and warm cache)
+  - gallery merge of a search (upsert + order + remove) at 1k/10k/100k
+    items: first search, identical re-run, re-run with ~10% changed
+  - GalleryDelegate.paint time per tile
+  - gallery memory (RSS growth per rendered item)
+
+Usage:
+    python scripts/bench.py --out bench.json
+    python scripts/bench.py --baseline bench.json     # exit 1 on regressions
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Add ./src (package) and ./scripts (stub server) to sys.path
+ROOT = Path(__file__).resolve().parents[1]
+for p in (ROOT / "src", ROOT / "scripts"):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from PySide6.QtCore import QBuffer, QEventLoop, QIODevice, QRect, QSize, QTimer  # noqa: E402
+from PySide6.QtGui import QColor, QIcon, QImage, QPainter, QPixmap  # noqa: E402
+from PySide6.QtWidgets import QApplication, QListWidget, QStyleOptionViewItem  # noqa: E402
+
+from image_hunter.core.gallery import merge_results, upsert_items  # noqa: E402
+from image_hunter.core.mock_data import make_mock_items  # noqa: E402
+from image_hunter.core.ranking import TopKRanker  # noqa: E402
+from image_hunter.core.thumbs import ThumbLoader  # noqa: E402
+from image_hunter.ui.gallery_delegate import GalleryDelegate  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (Linux /proc), falling back to peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _metric(value: float, unit: str, better: str = "lower") -> dict:
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def _png_payload(size: int = 128) -> bytes:
+    img = QImage(size, size, QImage.Format_RGB32)
+    img.fill(QColor("#2FB5B5"))
+    buf = QBuffer()
+    buf.open(QIODevice.WriteOnly)
+    img.save(buf, "PNG")
+    return bytes(buf.data())
+
+
+def _new_gallery() -> QListWidget:
+    w = QListWidget()
+    w.setViewMode(QListWidget.IconMode)
+    w.setUniformItemSizes(True)
+    w.setGridSize(QSize(170, 190))
+    w.setItemDelegate(GalleryDelegate(w))
+    return w
+
+
+def _by_provider(items: list) -> list[list]:
+    """Per-provider batches in order of first arrival, as the search streams them."""
+    batches: dict = {}
+    for it in items:
+        batches.setdefault(it.source, []).append(it)
+    return list(batches.values())
+
+
+def _changed(items: list, every: int = 10) -> list:
+    """Every `every`-th result replaced by a new one with a different title (~10% changed)."""
+    return [dataclasses.replace(it, id=f"new-{i}", title=f"bench {it.title}") if i % every == 0 else it
+            for i, it in enumerate(items)]
+
+
+# Benchmarks
+def bench_search(sizes: list[int], k: int = 30) -> dict:
+    out = {}
+    for n in sizes:
+        items = make_mock_items("bench", n=n)
+        w = _new_gallery()
+        inserted = [0]  # rows inserted = new tiles + tiles taken out and put back
+
+        def _count(_parent, first: int, last: int) -> None:
+            inserted[0] += last - first + 1
+        w.model().rowsInserted.connect(_count)
+
+        rss0 = _rss_bytes()
+        for phase, results in (("first", items), ("rerun", items), ("changed", _changed(items))):
+            before, inserted[0] = w.count(), 0
+            start = time.perf_counter()
+            removed = merge_results(w, TopKRanker("bench", k=k), _by_provider(results))
+            ms = (time.perf_counter() - start) * 1000.0
+            added = w.count() - before + len(removed)
+            out[f"search_merge.{n}.{phase}.ms"] = _metric(ms, "ms")
+            out[f"search_merge.{n}.{phase}.reinserted"] = _metric(inserted[0] - added, "tiles")
+            if phase == "first":
+                out[f"gallery_memory.{n}.bytes_per_item"] = _metric(max(_rss_bytes() - rss0, 0) / n, "bytes")
+        w.clear()
+        w.deleteLater()
+        QApplication.processEvents()
+    return out
+
+
+def bench_paint(iterations: int) -> dict:
+    w = _new_gallery()
+    upsert_items(w, make_mock_items("bench", n=2))
+    # Second tile gets a "loaded" thumbnail, like after ThumbLoader finished
+    w.item(1).setIcon(QIcon(QPixmap.fromImage(QImage.fromData(_png_payload()))))
+    delegate = w.itemDelegate()
+    canvas = QImage(170, 190, QImage.Format_ARGB32_Premultiplied)
+    option = QStyleOptionViewItem()
+    option.rect = QRect(0, 0, 170, 190)
+
+    out = {}
+    for row, name in ((0, "placeholder"), (1, "thumbnail")):
+        index = w.model().index(row, 0)
+        painter = QPainter(canvas)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            delegate.paint(painter, option, index)
+        us = (time.perf_counter() - start) * 1e6 / iterations
+        painter.end()
+        out[f"delegate_paint.{name}.us_per_tile"] = _metric(us, "us")
+    return out
+
+
+def bench_thumbs(n: int, latency_ms: float, bandwidth_bps: int, workers: int, timeout_s: float) -> dict:
+    out = {}
+    with StubServer(_png_payload(), latency_ms=latency_ms, bandwidth_bps=bandwidth_bps) as srv, \
+            tempfile.TemporaryDirectory(prefix="ih-bench-") as cache:
+        items = make_mock_items("bench", n=n)
+        for i, it in enumerate(items):
+            it.thumbnail_url = srv.url(f"/thumb/{i}.png")
+        w = _new_gallery()
+        upsert_items(w, items)
+        loader = ThumbLoader(max_workers=workers, cache_dir=Path(cache))
+
+        for phase in ("cold", "warm"):
+            done = {"ok": 0, "failed": 0, "batches": 0}
+            loop = QEventLoop()
+
+            def _tick(loaded: list, failed: list) -> None:
+                done["ok"] += len(loaded)
+                done["failed"] += len(failed)
+                done["batches"] += 1
+                if done["ok"] + done["failed"] >= n:
+                    loop.quit()
+
+            c1 = loader.signals.results.connect(_tick)
+            QTimer.singleShot(int(timeout_s * 1000), loop.quit)
+            start = time.perf_counter()
+            loader.load_for_list(w)
+            loop.exec()
+            secs = time.perf_counter() - start
+            loader.signals.results.disconnect(c1)
+            out[f"thumb_loader.{phase}.items_per_s"] = _metric(done["ok"] / secs if secs else 0.0, "items/s", "higher")
+            out[f"thumb_loader.{phase}.failed"] = _metric(done["failed"] + (n - done["ok"] - done["failed"]), "items")
+            out[f"thumb_loader.{phase}.ui_batches"] = _metric(done["batches"], "batches")
+        loader.cancel()
+    return out
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return human-readable regression lines (empty if none)."""
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if not base or base.get("value") is None:
+            continue
+        b, v = base["value"], cur["value"]
+        lower = cur["better"] == "lower"
+        if b == 0:
+            # No relative change from zero (e.g. failure counts): compare absolute values
+            worse = v > tolerance if lower else v < -tolerance
+            change = f"{v - b:+g}"
+        else:
+            worse = v > b * (1 + tolerance) if lower else v < b * (1 - tolerance)
+            change = f"{(v - b) / b:+.0%}"
+        if worse:
+            regressions.append(f"{name}: {v} {cur['unit']} (baseline {b}, {change})")
+    return regressions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1000,10000,100000", help="search result counts, comma-separated")
+    ap.add_argument("--paint-iterations", type=int, default=2000)
+    ap.add_argument("--thumbs", type=int, default=200, help="number of thumbnails to fetch")
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="stub server latency per request")
+    ap.add_argument("--bandwidth", type=int, default=0, help="stub server bytes/s per connection (0 = unlimited)")
+    ap.add_argument("--workers", type=int, default=6)
+    ap.add_argument("--timeout", type=float, default=60.0, help="seconds per ThumbLoader phase")
+    ap.add_argument("--out", type=Path, help="write results JSON here (default: stdout)")
+    ap.add_argument("--baseline", type=Path, help="compare against a previous results JSON")
+    ap.add_argument("--tolerance", type=float, default=0.20, help="allowed relative slowdown (default 0.20)")
+    args = ap.parse_args()
+
+    app = QApplication.instance() or QApplication([])  # noqa: F841 (must outlive the benchmarks)
+
+    results: dict = {}
+    results.update(bench_search([int(s) for s in args.sizes.split(",") if s.strip()]))
+    results.update(bench_paint(args.paint_iterations))
+    results.update(bench_thumbs(args.thumbs, args.latency_ms, args.bandwidth, args.workers, args.timeout))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qt_platform": os.environ.get("QT_QPA_PLATFORM"),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        base = json.loads(args.baseline.read_text(encoding="utf-8")).get("results", {})
+        regressions = compare(results, base, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions vs {args.baseline} (tolerance {args.tolerance:.0%})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
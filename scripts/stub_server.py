@@ -0,0 +1,87 @@
+from __future__ import annotations
+"""Local HTTP stub used by the benchmarks.
+
+Serves the same payload for every GET path, with an optional per-request
+latency, a per-connection bandwidth cap and `Range: bytes=N-` support, so
+loader throughput can be measured without touching the network.
+
+    with StubServer(payload, latency_ms=50, bandwidth_bps=2_000_000) as srv:
+        url = srv.url("/thumb/1.png")
+"""
+
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """Threaded HTTP server on 127.0.0.1 (random free port)."""
+
+    def __init__(self, payload: bytes, latency_ms: float = 0.0, bandwidth_bps: int = 0,
+                 content_type: str = "image/png") -> None:
+        self.payload = payload
+        self.latency_ms = latency_ms
+        self.bandwidth_bps = bandwidth_bps  # 0 = unlimited
+        self.content_type = content_type
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 (http.server API)
+                with server._lock:
+                    server.requests += 1
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000.0)
+                body = server.payload
+                rng = re.match(r"bytes=(\d+)-$", self.headers.get("Range", ""))
+                if rng and int(rng.group(1)) < len(body):
+                    start = int(rng.group(1))
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+                    body = body[start:]
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Type", server.content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not server.bandwidth_bps:
+                    self.wfile.write(body)
+                    return
+                # Send in 50 ms slices to honour the bandwidth cap
+                step = max(1, server.bandwidth_bps // 20)
+                for i in range(0, len(body), step):
+                    self.wfile.write(body[i:i + step])
+                    time.sleep(0.05)
+
+            def log_message(self, *_args) -> None:  # keep benchmark output clean
+                pass
+
+        return Handler
+
+    @property
+    def port(self) -> int:
+        return self._httpd.server_address[1]
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.stop()
@@ -6,33 +6,56 @@ Preferred way to run (from repo root):
 
 After editable install, this also works:
     python -m image_hunter.app
+
+Pass `--profile-startup` to print import/init timings to stderr once the
+first window is on screen.
 """
 
 import sys
 from pathlib import Path
-from PySide6.QtWidgets import QApplication
+
+from image_hunter.profiling import StartupProfiler
 
 
-def _load_stylesheet(app: QApplication) -> None:
+def _load_stylesheet(app) -> None:
     # Load the dark theme QSS (optional)
     qss_path = Path(__file__).resolve().parents[2] / "assets" / "ui.qss"
     if qss_path.exists():
         app.setStyleSheet(qss_path.read_text(encoding="utf-8"))
 
 
-from image_hunter.ui.main_window import MainWindow  # noqa: E402
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv if argv is None else argv)
+    profile = "--profile-startup" in argv
+    if profile:
+        argv.remove("--profile-startup")
+    prof = StartupProfiler(enabled=profile)
 
+    # Heavy imports are deferred until we actually need them
+    with prof.stage("import Qt widgets"):
+        from PySide6.QtCore import QTimer
+        from PySide6.QtWidgets import QApplication
 
-def main() -> int:
     # Create the Qt application (UI event loop)
-    app = QApplication(sys.argv)
-    app.setApplicationName("Image Hunter")
-    app.setOrganizationName("Image Hunter")
-    _load_stylesheet(app)
+    with prof.stage("QApplication"):
+        app = QApplication(argv)
+        app.setApplicationName("Image Hunter")
+        app.setOrganizationName("Image Hunter")
+    with prof.stage("stylesheet"):
+        _load_stylesheet(app)
+
+    with prof.stage("import main_window"):
+        from image_hunter.ui.main_window import MainWindow
 
     # Create and show the main window
-    window = MainWindow()
-    window.show()
+    with prof.stage("MainWindow()"):
+        window = MainWindow()
+    with prof.stage("show()"):
+        window.show()
+
+    # Report after the first event-loop pass (first paint has been processed)
+    if profile:
+        QTimer.singleShot(0, prof.report)
 
     # Enter the event loop and return the exit code
     return app.exec()
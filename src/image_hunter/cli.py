@@ -0,0 +1,201 @@
+from __future__ import annotations
+"""Headless bulk search-and-harvest (no display needed).
+
+Run from the repo root:
+    python harvest.py "dark fabric" "linen texture" --count 500 --fetch full
+
+or, after editable install:
+    python -m image_hunter.cli --help
+
+Every harvested item becomes one JSON line in the manifest (credit text,
+license URL, local path, status), written as downloads complete.
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import Future, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from image_hunter.core.download import error_kind, fetch_cached, local_name
+from image_hunter.core.executors import configure, io_executor, shutdown as shutdown_executors
+from image_hunter.core.filters import SCOPE_LICENSES, filter_items, parse_licenses
+from image_hunter.core.metrics import METRICS, provider_label
+from image_hunter.core.mock_data import make_mock_items
+from image_hunter.core.models import ImageItem
+from image_hunter.core.probe import DimensionIndex, probe_items
+
+def search(queries: Iterable[str], count: int) -> List[ImageItem]:
+    """Run every query and merge results (deduplicated by source + id)."""
+    seen = set()
+    out: List[ImageItem] = []
+    for q in queries:
+        with METRICS.timer("search"):
+            results = make_mock_items(q, n=count)
+        for it in results:
+            key = (it.source, it.id)
+            if key not in seen:
+                seen.add(key)
+                out.append(it)
+    return out
+
+
+def manifest_record(item: ImageItem, url: Optional[str], path: Optional[Path],
+                    status: str, error: Optional[str] = None) -> Dict:
+    return {
+        "id": item.id,
+        "source": item.source.name.lower(),
+        "title": item.title,
+        "author": item.author,
+        "license": item.license.name,
+        "license_url": item.license_url,
+        "credit_text": item.credit_text,
+        "source_url": item.source_url,
+        "url": url,
+        "width": item.width,
+        "height": item.height,
+        "path": str(path) if path else None,
+        "status": status,
+        "error": error,
+    }
+
+
+def _harvest_one(item: ImageItem, url: str, path: Path, timeout: float, max_bytes: int) -> Dict:
+    if path.is_file():
+        return manifest_record(item, url, path, "cached")
+    start = time.perf_counter()
+    try:
+        # Jobs sharing an output directory never fetch the same file twice
+        n = fetch_cached(url, path, lock_timeout=timeout * 3, timeout=timeout, max_bytes=max_bytes,
+                         user_agent="ImageHunter/0.1 (harvest)")
+    except Exception as e:  # keep going; the failure is recorded in the manifest
+        METRICS.error(provider_label(item), error_kind(e))
+        return manifest_record(item, url, None, "failed", str(e))
+    if n is None:
+        return manifest_record(item, url, path, "cached")
+    METRICS.observe("transfer", (time.perf_counter() - start) * 1000.0, provider_label(item))
+    return manifest_record(item, url, path, "ok")
+
+
+def harvest(items: List[ImageItem], fetch: str, out_dir: Path, manifest, workers: int,
+            timeout: float, max_bytes: int, progress=None) -> Dict[str, int]:
+    """Download items in parallel and stream manifest lines; return status counts."""
+    counts = {"ok": 0, "cached": 0, "failed": 0, "listed": 0}
+
+    def _write(rec: Dict) -> None:
+        manifest.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        counts[rec["status"]] += 1
+        if progress:
+            progress(sum(counts.values()), len(items))
+
+    if fetch == "none":
+        for it in items:
+            _write(manifest_record(it, it.image_url, None, "listed"))
+        return counts
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    configure(io_workers=workers, io_pending=workers * 4)
+    io = io_executor()
+    futures: Set[Future] = set()
+    try:
+        for it in items:
+            url = it.thumbnail_url if fetch == "thumb" else it.image_url
+            # Blocks while the I/O queue is full, so memory stays flat for huge batches
+            futures.add(io.submit(_harvest_one, it, url, out_dir / local_name(it, url), timeout, max_bytes))
+            for fut in [f for f in futures if f.done()]:
+                futures.discard(fut)
+                _write(fut.result())
+        for fut in as_completed(futures):
+            _write(fut.result())
+    finally:
+        shutdown_executors()
+    return counts
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="harvest", description="Bulk search and download licensed images.")
+    ap.add_argument("queries", nargs="*", help="search queries")
+    ap.add_argument("--queries-file", type=Path, help="file with one query per line")
+    ap.add_argument("--count", type=int, default=50, help="results per query (default 50)")
+    ap.add_argument("--scope", choices=sorted(SCOPE_LICENSES), default="pd",
+                    help="pd = PD/CC0 only, free = any free license (default pd)")
+    ap.add_argument("--license", action="append", default=[],
+                    help="only these licenses (comma-separated or repeated, overrides --scope), e.g. pd_cc0,cc_by")
+    ap.add_argument("--min-width", type=int)
+    ap.add_argument("--min-height", type=int)
+    ap.add_argument("--orientation", choices=("landscape", "portrait", "square"))
+    ap.add_argument("--no-probe", action="store_true",
+                    help="don't read image headers to fill in missing dimensions (drop those items instead)")
+    ap.add_argument("--fetch", choices=("thumb", "full", "none"), default="thumb",
+                    help="what to download (default thumb; none = manifest only)")
+    ap.add_argument("--out", type=Path, default=Path("harvest"), help="output directory (default ./harvest)")
+    ap.add_argument("--manifest", type=Path, help="JSONL manifest path (default <out>/manifest.jsonl)")
+    ap.add_argument("--workers", type=int, default=16, help="parallel downloads (default 16)")
+    ap.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    ap.add_argument("--max-mb", type=float, help="per-file size limit in MB (default 5 thumb / 100 full)")
+    ap.add_argument("--metrics", type=Path, help="write metrics here (.prom = Prometheus text, else JSON)")
+    ap.add_argument("-q", "--quiet", action="store_true", help="no progress output")
+    return ap
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = build_parser()
+    args = ap.parse_args(argv)
+
+    queries = list(args.queries)
+    if args.queries_file:
+        queries += [ln.strip() for ln in args.queries_file.read_text(encoding="utf-8").splitlines() if ln.strip()]
+    if not queries:
+        ap.error("no queries given")
+
+    try:
+        wanted = parse_licenses(x for arg in args.license for x in arg.split(","))
+    except ValueError as e:
+        ap.error(str(e))
+    # An explicit --license list replaces the scope (the default scope is PD only)
+    licenses = wanted or set(SCOPE_LICENSES[args.scope])
+
+    start = time.perf_counter()
+    items = list(filter_items(search(queries, args.count), licenses=licenses))
+    if args.min_width or args.min_height or args.orientation:
+        if not args.no_probe:
+            # Providers often omit width/height; read just the image headers to find out
+            configure(io_workers=max(1, args.workers), io_pending=max(1, args.workers) * 4)
+            try:
+                probe_items(items, DimensionIndex(), timeout=args.timeout)
+            finally:
+                shutdown_executors()
+        items = list(filter_items(items, min_width=args.min_width, min_height=args.min_height,
+                                  orientation=args.orientation))
+
+    max_mb = args.max_mb if args.max_mb is not None else (5 if args.fetch == "thumb" else 100)
+    manifest_path = args.manifest or args.out / "manifest.jsonl"
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _progress(done: int, total: int) -> None:
+        if not args.quiet and (done == total or done % 100 == 0):
+            print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+
+    with open(manifest_path, "w", encoding="utf-8") as manifest:
+        counts = harvest(items, args.fetch, args.out, manifest, max(1, args.workers),
+                         args.timeout, int(max_mb * 1024 * 1024), _progress)
+
+    secs = time.perf_counter() - start
+    if not args.quiet:
+        if items:
+            print(file=sys.stderr)
+        summary = ", ".join(f"{k} {v}" for k, v in counts.items() if v)
+        print(f"{len(items)} items in {secs:.1f}s ({len(items) / secs if secs else 0:.0f}/s): "
+              f"{summary or 'nothing matched'} -> {manifest_path}", file=sys.stderr)
+
+    if args.metrics:
+        text = METRICS.to_prometheus() if args.metrics.suffix == ".prom" else METRICS.to_json()
+        args.metrics.write_text(text, encoding="utf-8")
+
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
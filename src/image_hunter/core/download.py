@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import os
+import re
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path, PurePosixPath
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+from .filelock import file_lock, lock_path_for, private_temp
+
+# Shared by the GUI loaders and the headless CLI (no Qt imports here)
+
+CHUNK = 64 * 1024
+_IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".tif", ".tiff", ".bmp"}
+_SAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class DownloadError(Exception):
+    """A download was rejected or interrupted by our own guards (size limits, pause, etc.)."""
+    def __init__(self, kind: str, message: str) -> None:
+        super().__init__(message)
+        self.kind = kind
+
+
+def error_kind(exc: BaseException) -> str:
+    """Collapse an exception into a low-cardinality metric label."""
+    if isinstance(exc, DownloadError):
+        return exc.kind
+    if isinstance(exc, urllib.error.HTTPError):
+        return f"http_{exc.code}"
+    if isinstance(exc, (socket.timeout, TimeoutError)):
+        return "timeout"
+    if isinstance(exc, urllib.error.URLError):
+        return "timeout" if isinstance(exc.reason, (socket.timeout, TimeoutError)) else "network"
+    return type(exc).__name__
+
+
+def local_name(item, url: str) -> str:
+    """Stable, filesystem-safe file name for an ImageItem: <source>_<id><ext>."""
+    ext = PurePosixPath(urlparse(url).path).suffix.lower()
+    if ext not in _IMAGE_EXTS:
+        ext = ".img"
+    return f"{item.source.name.lower()}_{_SAFE.sub('_', item.id)}{ext}"
+
+
+class BandwidthLimiter:
+    """
+    Global byte-rate cap shared by concurrent transfers (token bucket).
+
+    Callers are served strictly in arrival order, one chunk at a time, so
+    active transfers take turns and split the cap evenly. rate_bps <= 0
+    means unlimited.
+    """
+
+    def __init__(self, rate_bps: int = 0) -> None:
+        self._cond = threading.Condition()
+        self._rate = rate_bps
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self._next_ticket = 0
+        self._serving = 0
+
+    @property
+    def rate(self) -> int:
+        return self._rate
+
+    def set_rate(self, rate_bps: int) -> None:
+        with self._cond:
+            self._rate = rate_bps
+            self._tokens = min(self._tokens, 0.0)
+            self._cond.notify_all()
+
+    def acquire(self, n: int) -> None:
+        """Block until `n` bytes may be transferred."""
+        if self._rate <= 0:
+            return
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            while ticket != self._serving:
+                self._cond.wait()
+            try:
+                while self._rate > 0:
+                    now = time.monotonic()
+                    # Refill, allowing at most a quarter second of burst
+                    self._tokens = min(self._rate / 4, self._tokens + (now - self._last) * self._rate)
+                    self._last = now
+                    if self._tokens > 0:
+                        self._tokens -= n  # may go negative; the debt is paid by the next caller
+                        break
+                    self._cond.wait(-self._tokens / self._rate)
+            finally:
+                self._serving += 1
+                self._cond.notify_all()
+
+
+def fetch_to_file(url: str, path: Path, timeout: float = 10.0, max_bytes: int = 5_000_000,
+                  user_agent: str = "ImageHunter/0.1",
+                  limiter: Optional[BandwidthLimiter] = None,
+                  should_stop: Optional[Callable[[], bool]] = None,
+                  progress: Optional[Callable[[int, int], None]] = None,
+                  partial: Optional[Path] = None) -> int:
+    """
+    Stream `url` into `path` (via a temp file + os.replace) and return the byte count.
+
+    - limiter: shared bandwidth cap.
+    - should_stop: polled between chunks; when it returns True the transfer
+      stops with DownloadError("stopped").
+    - progress: called with (bytes so far, total or 0 if unknown).
+    - partial: resumable temp file. It is kept when the transfer stops, and
+      the next call continues from its size with a Range request.
+
+    Without `partial`, the temp file name is unique to this process and
+    thread, so concurrent writers never share (or clobber) a temp file.
+
+    Raises DownloadError when a guard trips; network errors propagate as-is.
+    """
+    tmp = partial or private_temp(path)
+    offset = tmp.stat().st_size if partial is not None and tmp.is_file() else 0
+
+    # Prepare request (polite headers)
+    headers = {
+        "User-Agent": user_agent,
+        "Accept": "image/*,*/*;q=0.8",
+    }
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            if offset and resp.status != 206:
+                offset = 0  # server ignored the Range header; start over
+
+            # Basic size guard (if server provides Content-Length)
+            length = resp.headers.get("Content-Length")
+            total = offset + int(length) if length else 0
+            if total > max_bytes:
+                raise DownloadError("too_large", "Content too large")
+
+            # Stream to temp then move (atomic-ish)
+            chunk_size = CHUNK if limiter is None or limiter.rate <= 0 else 16 * 1024
+            read = offset
+            with open(tmp, "ab" if offset else "wb") as f:
+                while True:
+                    if should_stop is not None and should_stop():
+                        raise DownloadError("stopped", "Stopped")
+                    if limiter is not None:
+                        limiter.acquire(chunk_size)
+                    chunk = resp.read(chunk_size)
+                    if not chunk:
+                        break
+                    read += len(chunk)
+                    if read > max_bytes:
+                        f.close()
+                        tmp.unlink(missing_ok=True)
+                        raise DownloadError("too_large", "Exceeded max size")
+                    f.write(chunk)
+                    if progress is not None:
+                        progress(read, total)
+            os.replace(tmp, path)
+            return read
+    except BaseException:
+        if partial is None:
+            tmp.unlink(missing_ok=True)  # nobody resumes a private temp file
+        raise
+
+def fetch_cached(url: str, path: Path, lock_timeout: float = 60.0, **kwargs) -> Optional[int]:
+    """
+    fetch_to_file() unless `path` already exists; None means it was cached.
+
+    Single-flight across threads and processes sharing the directory: the
+    download runs under the path's lock file, and whoever waited on it
+    finds the file in place instead of fetching it again.
+    """
+    if path.is_file():
+        return None
+    with file_lock(lock_path_for(path), timeout=lock_timeout):
+        if path.is_file():  # fetched by someone else while we waited
+            return None
+        return fetch_to_file(url, path, **kwargs)
@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+import itertools
+import json
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from PySide6.QtCore import QObject, QStandardPaths, QTimer, Signal
+
+from .download import BandwidthLimiter, DownloadError, error_kind, fetch_to_file, local_name
+from .executors import BoundedExecutor
+from .filelock import file_lock, lock_path_for, update_json
+from .metrics import METRICS
+from .models import ImageItem
+
+
+# Entry states
+QUEUED, ACTIVE, PAUSED, DONE, FAILED = "queued", "active", "paused", "done", "failed"
+
+LOCKED_RETRY = 2.0  # seconds before retrying an entry whose file another process is writing
+SAVE_DELAY_MS = 250  # mutations within this window are written to disk once
+REMOVED_TTL = 30 * 24 * 3600  # seconds a removal is remembered in the state file
+
+
+def default_download_dir() -> Path:
+    """<Pictures>/Image Hunter"""
+    base = QStandardPaths.writableLocation(QStandardPaths.PicturesLocation) or str(Path.home())
+    return Path(base) / "Image Hunter"
+
+
+def default_state_file() -> Path:
+    """<AppData>/download_queue.json"""
+    base = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation) or str(Path.home() / ".image_hunter")
+    return Path(base) / "download_queue.json"
+
+
+@dataclass
+class QueueEntry:
+    """One original-image download (persisted as JSON)."""
+    url: str
+    dest: str
+    title: str
+    provider: str
+    credit_text: str = ""
+    license_url: str = ""
+    priority: int = 0               # higher runs first
+    seq: int = 0                    # insertion order (tie-break)
+    status: str = QUEUED
+    bytes_done: int = 0
+    total: int = 0
+    error: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    @property
+    def part_path(self) -> Path:
+        return Path(self.dest + ".part")
+
+
+class DownloadQueue(QObject):
+    """
+    Persistent queue of full-size downloads.
+
+    - Survives restarts: state lives in a JSON file, and interrupted
+      transfers resume from their `.part` file.
+    - Runs on its own executor, so bulk saves never occupy the thumbnail
+      I/O pool.
+    - A shared BandwidthLimiter caps the total rate and splits it evenly
+      across active transfers.
+    - Entries have a priority (higher first) and can be paused/resumed.
+    - Safe to share between processes: a transfer runs under its file's
+      lock (entries held elsewhere are retried later), and save() merges
+      with the state file on disk instead of overwriting it.
+    - Mutations are cheap on the UI thread: bulk operations settle under one
+      lock with a single `changed`, and saves are coalesced on a timer.
+    """
+    changed = Signal(str)                # entry id ("" = list changed)
+    progress = Signal(str, int, int)     # entry id, bytes done, total (0 if unknown)
+    _finished = Signal(str)              # worker -> UI thread: entry settled
+    _save_async = Signal()               # worker -> UI thread: persist progress
+
+    def __init__(self, parent: Optional[QObject] = None, state_file: Optional[Path] = None,
+                 download_dir: Optional[Path] = None, max_concurrent: int = 3,
+                 rate_bps: int = 0, max_bytes: int = 200_000_000) -> None:
+        super().__init__(parent)
+        self.state_file = state_file or default_state_file()
+        self.download_dir = download_dir or default_download_dir()
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_bytes = max_bytes
+        self.limiter = BandwidthLimiter(rate_bps)
+        self._executor = BoundedExecutor("downloads", self.max_concurrent)
+        self._lock = threading.RLock()
+        self._entries: Dict[str, QueueEntry] = {}
+        self._stop: set[str] = set()     # ids asked to pause/remove while active
+        self._removed: Dict[str, float] = {}  # id -> removal time (tombstones in the state file)
+        self._locked: Dict[str, float] = {}  # id -> monotonic time before which not to retry
+        self._retry_pending = False
+        self._seq = itertools.count()
+        self._closing = False            # set by shutdown(); no new transfers start
+        self._last_progress_save = 0.0
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(SAVE_DELAY_MS)
+        self._save_timer.timeout.connect(self.save)
+        self._finished.connect(self._changed)
+        self._save_async.connect(self._save_soon)
+        self._load()
+
+    # Persistence
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.state_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        for raw in data.get("entries", []):
+            try:
+                e = QueueEntry(**raw)
+            except TypeError:
+                continue  # written by an incompatible version
+            if e.status == ACTIVE:
+                e.status = QUEUED  # interrupted by the last shutdown; resumes from .part
+            self._entries[e.id] = e
+        start = max((e.seq for e in self._entries.values()), default=-1) + 1
+        self._seq = itertools.count(start)
+
+    def save(self) -> None:
+        # Other processes may share the file: keep their entries, honour their removals
+        with self._lock:
+            before = {i: e.status for i, e in self._entries.items()}
+            update_json(self.state_file, self._merge, indent=2)
+            external = before != {i: e.status for i, e in self._entries.items()}
+        if external:
+            self.changed.emit("")
+
+    def _merge(self, data: dict) -> dict:
+        # Called by update_json under the file lock, with self._lock held
+        now = time.time()
+        try:
+            removed = {i: float(ts) for i, ts in data.get("removed", {}).items()}
+        except (ValueError, TypeError, AttributeError):
+            removed = {}
+        removed.update(self._removed)
+        self._removed = {i: ts for i, ts in removed.items() if now - ts < REMOVED_TTL}
+        on_disk = data.get("entries", [])
+        merged = {raw["id"]: raw for raw in on_disk if isinstance(raw, dict) and "id" in raw}
+        for e in list(self._entries.values()):
+            raw = merged.get(e.id)
+            if e.id in self._removed:
+                self._drop(e)  # removed by another process sharing this queue
+                continue
+            if raw is not None and raw.get("status") == DONE and e.status in (QUEUED, PAUSED, FAILED):
+                # Finished by another process sharing this queue
+                e.status, e.error = DONE, None
+                e.bytes_done, e.total = raw.get("bytes_done", 0), raw.get("total", 0)
+            merged[e.id] = asdict(e)
+        entries = sorted((r for i, r in merged.items() if i not in self._removed),
+                         key=lambda r: (-r.get("priority", 0), r.get("seq", 0)))
+        # Removals are kept as tombstones so other instances drop the entry too
+        return {"version": 1, "entries": entries, "removed": self._removed}
+
+    # Queries
+    def entries(self) -> List[QueueEntry]:
+        """All entries in scheduling order (priority, then insertion)."""
+        with self._lock:
+            return sorted(self._entries.values(), key=lambda e: (-e.priority, e.seq))
+
+    def get(self, entry_id: str) -> Optional[QueueEntry]:
+        return self._entries.get(entry_id)
+
+    def local_path(self, url: str) -> Optional[Path]:
+        """Path of a finished download of `url`, if there is one on disk."""
+        for e in self._entries.values():
+            if e.url == url and e.status == DONE and Path(e.dest).is_file():
+                return Path(e.dest)
+        return None
+
+    def has_unfinished(self) -> bool:
+        return any(e.status in (QUEUED, ACTIVE, PAUSED) for e in self._entries.values())
+
+    # Mutations (UI thread)
+    def add_items(self, items: Iterable[ImageItem], priority: int = 0) -> List[str]:
+        """Queue the originals of `items` (already-queued URLs are skipped)."""
+        ids = []
+        with self._lock:
+            known = {e.url for e in self._entries.values() if e.status != FAILED}
+            for it in items:
+                if not it.image_url or it.image_url in known:
+                    continue
+                e = QueueEntry(
+                    url=it.image_url,
+                    dest=str(self.download_dir / local_name(it, it.image_url)),
+                    title=it.title,
+                    provider=it.source.name.lower(),
+                    credit_text=it.credit_text,
+                    license_url=it.license_url,
+                    priority=priority,
+                    seq=next(self._seq),
+                )
+                self._entries[e.id] = e
+                known.add(e.url)
+                ids.append(e.id)
+        if ids:
+            self._changed("")
+        return ids
+
+    def set_priority(self, entry_id: str, priority: int) -> None:
+        with self._lock:
+            e = self._entries.get(entry_id)
+            if e is None or e.priority == priority:
+                return
+            e.priority = priority
+        self._changed("")
+
+    def move(self, entry_id: str, delta: int) -> None:
+        """Raise (delta > 0) or lower the priority of one entry."""
+        self.move_many([entry_id], delta)
+
+    def move_many(self, entry_ids: Iterable[str], delta: int) -> None:
+        with self._lock:
+            moved = [e for e in map(self._entries.get, entry_ids) if e is not None]
+            for e in moved:
+                e.priority += delta
+        if moved and delta:
+            self._changed("")
+
+    def pause(self, entry_id: str) -> None:
+        self.pause_many([entry_id])
+
+    def pause_many(self, entry_ids: Iterable[str]) -> None:
+        changed = []
+        with self._lock:
+            for entry_id in entry_ids:
+                e = self._entries.get(entry_id)
+                if e is None or e.status not in (QUEUED, ACTIVE):
+                    continue
+                if e.status == ACTIVE:
+                    self._stop.add(entry_id)  # worker parks it as PAUSED when it notices
+                else:
+                    e.status = PAUSED
+                changed.append(entry_id)
+        self._changed_many(changed)
+
+    def resume(self, entry_id: str) -> None:
+        self.resume_many([entry_id])
+
+    def resume_many(self, entry_ids: Iterable[str]) -> None:
+        changed = []
+        with self._lock:
+            for entry_id in entry_ids:
+                e = self._entries.get(entry_id)
+                if e is None or e.status not in (PAUSED, FAILED):
+                    continue
+                self._stop.discard(entry_id)
+                e.status, e.error = QUEUED, None
+                changed.append(entry_id)
+        self._changed_many(changed)
+
+    def pause_all(self) -> None:
+        self.pause_many(list(self._entries))
+
+    def resume_all(self) -> None:
+        self.resume_many(list(self._entries))
+
+    def remove(self, entry_id: str) -> None:
+        self.remove_many([entry_id])
+
+    def remove_many(self, entry_ids: Iterable[str]) -> None:
+        removed = False
+        with self._lock:
+            for entry_id in entry_ids:
+                e = self._entries.get(entry_id)
+                if e is None:
+                    continue
+                removed = True
+                self._removed[entry_id] = time.time()
+                self._drop(e)
+        if removed:
+            self._changed("")
+
+    def clear_finished(self) -> None:
+        with self._lock:
+            for e in [e for e in self._entries.values() if e.status == DONE]:
+                self._removed[e.id] = time.time()
+                self._drop(e)
+        self._changed("")
+
+    def _drop(self, e: QueueEntry) -> None:
+        # With self._lock held
+        del self._entries[e.id]
+        if e.status == ACTIVE:
+            self._stop.add(e.id)  # the worker deletes the .part file when it stops
+        else:
+            e.part_path.unlink(missing_ok=True)
+
+    def set_rate(self, rate_bps: int) -> None:
+        self.limiter.set_rate(rate_bps)
+
+    # Scheduling
+    def _changed(self, entry_id: str) -> None:
+        self._save_soon()
+        self.changed.emit(entry_id)
+        self._schedule()
+
+    def _changed_many(self, entry_ids: List[str]) -> None:
+        if len(entry_ids) == 1:
+            self._changed(entry_ids[0])
+        elif entry_ids:
+            self._changed("")
+
+    def _save_soon(self) -> None:
+        if not self._save_timer.isActive():
+            self._save_timer.start()
+
+    def _schedule(self) -> None:
+        with self._lock:
+            if self._closing:
+                return
+            active = sum(1 for e in self._entries.values() if e.status == ACTIVE)
+            now = time.monotonic()
+            waiting = False
+            for e in self.entries():
+                if active >= self.max_concurrent:
+                    break
+                if e.status != QUEUED:
+                    continue
+                if self._locked.get(e.id, 0.0) > now:
+                    waiting = True
+                    continue
+                if self._executor.try_submit(self._run, e.id) is None:
+                    break
+                e.status = ACTIVE
+                active += 1
+            if waiting and not self._retry_pending:
+                self._retry_pending = True
+                QTimer.singleShot(int(LOCKED_RETRY * 1000), self._retry_locked)
+
+    def _retry_locked(self) -> None:
+        self._retry_pending = False
+        self._schedule()
+
+    def start(self) -> None:
+        """Begin (or continue) processing queued entries."""
+        self._schedule()
+
+    def shutdown(self) -> None:
+        """
+        Stop active transfers and persist the queue (call on application exit).
+        Interrupted entries stay queued and resume from their `.part` file.
+        """
+        with self._lock:
+            self._closing = True
+            self._stop.update(e.id for e in self._entries.values() if e.status == ACTIVE)
+        self.limiter.set_rate(0)  # wake transfers throttled mid-chunk
+        # Workers notice the stop between chunks; their final state is set
+        # before they return, so saving after the wait captures it
+        self._executor.shutdown(wait=True)
+        self._save_timer.stop()
+        self.save()
+
+    def _run(self, entry_id: str) -> None:
+        # Worker thread: one transfer, then hand the slot back
+        e = self._entries.get(entry_id)
+        if e is None:
+            return
+        dest = Path(e.dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            # Never share a .part file: if another process (or a preview /
+            # harvest fetching the same file) holds the lock, try again later
+            with file_lock(lock_path_for(dest), timeout=0):
+                self._transfer(e)
+        except TimeoutError:
+            with self._lock:
+                if e.status == ACTIVE:
+                    e.status = PAUSED if entry_id in self._stop else QUEUED
+                    self._locked[entry_id] = time.monotonic() + LOCKED_RETRY
+                self._stop.discard(entry_id)
+        # Signals are queued to the UI thread; _changed there persists + schedules
+        self._finished.emit(entry_id)
+
+    def _transfer(self, e: QueueEntry) -> None:
+        # Worker thread, holding the file's lock; settles e.status
+        dest = Path(e.dest)
+        start = time.perf_counter()
+        adopted = dest.is_file() and not e.part_path.exists()  # finished by whoever held the lock before us
+        try:
+            if adopted:
+                n = dest.stat().st_size
+            else:
+                n = fetch_to_file(
+                    e.url, dest, timeout=30.0, max_bytes=self.max_bytes,
+                    user_agent="ImageHunter/0.1 (download-queue)",
+                    limiter=self.limiter,
+                    should_stop=lambda: e.id in self._stop,
+                    progress=lambda done, total: self._on_progress(e, done, total),
+                    partial=e.part_path,
+                )
+        except DownloadError as ex:
+            with self._lock:
+                stopped = ex.kind == "stopped"
+                e.status, e.error = (PAUSED, None) if stopped else (FAILED, str(ex))
+                if stopped and self._closing:
+                    e.status = QUEUED  # interrupted by shutdown, not paused by the user
+                self._stop.discard(e.id)
+            if e.id not in self._entries:
+                e.part_path.unlink(missing_ok=True)  # removed while active
+            if not stopped:
+                METRICS.error(e.provider, ex.kind)
+        except Exception as ex:  # network errors, timeouts, etc.
+            with self._lock:
+                e.status, e.error = FAILED, str(ex)
+            METRICS.error(e.provider, error_kind(ex))
+        else:
+            if not adopted:
+                METRICS.observe("transfer", (time.perf_counter() - start) * 1000.0, e.provider)
+            with self._lock:
+                e.status, e.bytes_done, e.error = DONE, n, None
+                e.total = e.total or n
+                self._locked.pop(e.id, None)
+
+    def _on_progress(self, e: QueueEntry, done: int, total: int) -> None:
+        e.bytes_done, e.total = done, total
+        self.progress.emit(e.id, done, total)
+        now = time.monotonic()
+        if now - self._last_progress_save > 2.0:  # keep byte counts roughly current on disk
+            self._last_progress_save = now
+            self._save_async.emit()
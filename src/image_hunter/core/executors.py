@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+
+class QueueFull(Exception):
+    """Raised by BoundedExecutor.submit when no slot frees up in time."""
+
+
+class BoundedExecutor:
+    """
+    A dedicated worker pool with a cap on queued + running tasks.
+
+    - try_submit(): non-blocking, returns None when full (use from the UI thread
+      and re-offer work when a task finishes).
+    - submit(): blocks until a slot is free (use from worker threads / batch jobs).
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: Optional[int] = None,
+                 processes: bool = False) -> None:
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_workers, max_pending or self.max_workers * 4)
+        self.processes = processes
+        self._inflight = 0
+        self._cond = threading.Condition()
+        self._waiters: List[Callable[[], None]] = []
+        self._pool: Executor = (
+            # spawn, not fork: forking a process that runs Qt and worker threads is unsafe
+            ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            if processes
+            else ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        )
+
+    @property
+    def inflight(self) -> int:
+        """Tasks accepted but not finished (queued + running)."""
+        return self._inflight
+
+    @property
+    def free_slots(self) -> int:
+        return max(0, self.max_pending - self._inflight)
+
+    def try_submit(self, fn: Callable, *args) -> Optional[Future]:
+        with self._cond:
+            if self._inflight >= self.max_pending:
+                return None
+            self._inflight += 1
+        return self._start(fn, args)
+
+    def submit(self, fn: Callable, *args, timeout: Optional[float] = None) -> Future:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._inflight < self.max_pending, timeout):
+                raise QueueFull(f"{self.name}: {self.max_pending} tasks pending")
+            self._inflight += 1
+        return self._start(fn, args)
+
+    def _start(self, fn: Callable, args: tuple) -> Future:
+        try:
+            fut = self._pool.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        fut.add_done_callback(self._release)
+        return fut
+
+    def notify_when_free(self, callback: Callable[[], None]) -> None:
+        """Call `callback()` once a slot is available (immediately if one is)."""
+        with self._cond:
+            if self._inflight >= self.max_pending:
+                self._waiters.append(callback)
+                return
+        callback()
+
+    def _release(self, _fut: Optional[Future] = None) -> None:
+        with self._cond:
+            self._inflight -= 1
+            self._cond.notify()
+            waiters, self._waiters = self._waiters, []
+        for cb in waiters:
+            cb()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Process-wide pools, created lazily on first use
+_lock = threading.Lock()
+_io: Optional[BoundedExecutor] = None
+_cpu: Optional[BoundedExecutor] = None
+_config = {
+    "io_workers": 8,              # blocking network waits: more threads than cores is fine
+    "io_pending": 64,
+    "cpu_workers": os.cpu_count() or 2,
+    "cpu_pending": None,          # default: 4 x workers
+    "cpu_processes": False,       # True = process pool (picklable, GIL-bound functions only)
+}
+
+
+def configure(**options) -> None:
+    """Override pool sizes before first use (keys as in `_config`)."""
+    unknown = set(options) - set(_config)
+    if unknown:
+        raise ValueError(f"Unknown executor option(s): {', '.join(sorted(unknown))}")
+    with _lock:
+        if _io is not None or _cpu is not None:
+            raise RuntimeError("Executors already started; call configure() earlier")
+        _config.update(options)
+
+
+def io_executor() -> BoundedExecutor:
+    """Pool for downloads and other blocking I/O."""
+    global _io
+    with _lock:
+        if _io is None:
+            _io = BoundedExecutor("io", _config["io_workers"], _config["io_pending"])
+        return _io
+
+
+def cpu_executor() -> BoundedExecutor:
+    """Pool sized to the CPU count for decoding, hashing and resizing."""
+    global _cpu
+    with _lock:
+        if _cpu is None:
+            _cpu = BoundedExecutor("cpu", _config["cpu_workers"], _config["cpu_pending"],
+                                   processes=_config["cpu_processes"])
+        return _cpu
+
+
+def shutdown(wait: bool = True) -> None:
+    """Stop both pools (they are recreated on next use)."""
+    global _io, _cpu
+    with _lock:
+        pools, _io, _cpu = (_io, _cpu), None, None
+    for p in pools:
+        if p is not None:
+            p.shutdown(wait=wait)
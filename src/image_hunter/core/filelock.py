@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+# Advisory file locks shared by every process on the host (GUI instances,
+# harvest jobs) that writes into the same cache directory. No Qt imports here.
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(f) -> bool:
+        f.seek(0)
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(f) -> bool:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# Lock files are striped by name hash, so a cache holds at most this many
+LOCK_STRIPES = 256
+
+
+def lock_path_for(path: Path) -> Path:
+    """Lock file guarding `path`: <dir>/.locks/<stripe>.lock"""
+    stripe = int(hashlib.sha1(path.name.encode("utf-8")).hexdigest()[:8], 16) % LOCK_STRIPES
+    return path.parent / ".locks" / f"{stripe:02x}.lock"
+
+
+@contextmanager
+def file_lock(path: Path, timeout: float = 60.0) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on `path` (created if missing).
+
+    Excludes other processes and other threads of this one (every call opens
+    its own handle). The OS drops the lock if the holder dies, so lock files
+    are never stale and are left in place. Raises TimeoutError after `timeout`.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        deadline = time.monotonic() + timeout
+        delay = 0.005
+        while not _try_lock(f):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for lock {path}")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        try:
+            yield
+        finally:
+            _unlock(f)
+
+
+def private_temp(path: Path) -> Path:
+    """Temp file next to `path`, unique to this process and thread."""
+    return path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+
+def update_json(path: Path, merge: Callable[[dict], dict], indent: Optional[int] = None,
+                timeout: float = 60.0) -> None:
+    """
+    Read-modify-write a JSON file shared by several processes.
+
+    Under `<path>.lock`, reads the current contents ({} if missing or
+    unreadable), passes them to `merge` and atomically replaces the file
+    with what it returns. Writers therefore never drop each other's data.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path.with_name(path.name + ".lock"), timeout=timeout):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        payload = merge(data if isinstance(data, dict) else {})
+        tmp = private_temp(path)
+        tmp.write_text(json.dumps(payload, indent=indent), encoding="utf-8")
+        os.replace(tmp, path)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Optional, Set
+from .models import ImageItem, License
+
+
+# Search scopes, as in the top bar: PD/CC0 only, or any free license
+SCOPE_LICENSES = {
+    "pd": {License.PD_CC0},
+    "free": set(License),
+}
+
+
+def parse_licenses(names: Iterable[str]) -> Set[License]:
+    """Map names like 'pd_cc0', 'CC-BY' or 'unsplash' to License members."""
+    out: Set[License] = set()
+    for name in names:
+        key = name.strip().upper().replace("-", "_").replace("/", "_")
+        if not key:
+            continue
+        if key in ("PD", "CC0"):
+            key = "PD_CC0"
+        try:
+            out.add(License[key])
+        except KeyError:
+            raise ValueError(f"Unknown license: {name!r}") from None
+    return out
+
+
+def filter_items(
+    items: Iterable[ImageItem],
+    licenses: Optional[Set[License]] = None,
+    min_width: Optional[int] = None,
+    min_height: Optional[int] = None,
+    orientation: Optional[str] = None,
+) -> Iterator[ImageItem]:
+    """
+    Yield items matching every given criterion (None = don't filter).
+    Items with unknown dimensions fail dimension/orientation filters.
+    """
+    for it in items:
+        if licenses is not None and it.license not in licenses:
+            continue
+        if min_width and (it.width or 0) < min_width:
+            continue
+        if min_height and (it.height or 0) < min_height:
+            continue
+        if orientation and it.orientation != orientation:
+            continue
+        yield it
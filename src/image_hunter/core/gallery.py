@@ -1,19 +1,186 @@
 from __future__ import annotations
 
-from typing import Callable, Optional, Iterable
-from PySide6.QtCore import Qt, QSize
+from functools import lru_cache
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+from PySide6.QtCore import Qt, QSize, QItemSelectionModel
 from PySide6.QtGui import QIcon, QPixmap, QPainter, QColor, QFont
 from PySide6.QtWidgets import QListWidget, QListWidgetItem
-from .models import ImageItem
+from .models import ImageItem, item_key
 
+# Each tile also stores its item_key, so diffing the gallery doesn't
+# recompute keys from the payload for every row
+KEY_ROLE = Qt.UserRole + 1
 
-def clear_gallery(widget: QListWidget) -> None:
-    """Remove all items from the gallery list."""
-    widget.clear()
 
+def tiles_by_key(widget: QListWidget) -> Dict[str, QListWidgetItem]:
+    """Map item_key -> tile for every tile in the gallery."""
+    out: Dict[str, QListWidgetItem] = {}
+    for i in range(widget.count()):
+        li = widget.item(i)
+        k = li.data(KEY_ROLE)
+        if k is not None:
+            out[k] = li
+    return out
 
+
+def _stable_positions(seq: Sequence[int]) -> set[int]:
+    """Indices into `seq` forming a longest increasing subsequence (O(n log n))."""
+    tail_vals: List[int] = []   # smallest tail value of an increasing run of length k+1
+    tail_idx: List[int] = []
+    prev: List[int] = [-1] * len(seq)
+    for i, v in enumerate(seq):
+        k = bisect_left(tail_vals, v)
+        if k:
+            prev[i] = tail_idx[k - 1]
+        if k == len(tail_vals):
+            tail_vals.append(v)
+            tail_idx.append(i)
+        else:
+            tail_vals[k] = v
+            tail_idx[k] = i
+    out = set()
+    i = tail_idx[-1] if tail_idx else -1
+    while i != -1:
+        out.add(i)
+        i = prev[i]
+    return out
+
+
+def apply_order(widget: QListWidget, keys: Sequence[str]) -> int:
+    """
+    Reorder gallery tiles to match `keys` (item_key order; tiles not listed
+    go last). Only out-of-place tiles are touched: tiles on a longest
+    increasing run of the current order stay put, the rest are taken out and
+    re-inserted at their target row. Icons and the current item are kept.
+    Returns the number of moved tiles.
+    """
+    current = [widget.item(i).data(KEY_ROLE) for i in range(widget.count())]
+    pos = {k: i for i, k in enumerate(current)}
+    wanted = [k for k in dict.fromkeys(keys) if k in pos]
+    listed = set(wanted)
+    target = wanted + [k for k in current if k not in listed]
+    stable = _stable_positions([pos[k] for k in target])
+    if len(stable) == len(target):
+        return 0
+
+    cur = widget.currentItem()
+    moving = [(i, k) for i, k in enumerate(target) if i not in stable]
+    moved = len(moving)
+    if moved * 2 > len(target):
+        # Mostly reshuffled: taking every tile and appending it back is linear,
+        # while inserting into the middle of the list is not
+        moving = list(enumerate(target))
+    taken = {}
+    selected = set()
+    for row in sorted((pos[k] for _, k in moving), reverse=True):
+        li = widget.item(row)
+        if li.isSelected():
+            selected.add(current[row])
+        taken[current[row]] = widget.takeItem(row)
+    for i, k in moving:  # ascending target rows: everything above row i is already final
+        widget.insertItem(i, taken[k])
+        if k in selected:
+            taken[k].setSelected(True)
+    if cur is not None:
+        widget.setCurrentItem(cur, QItemSelectionModel.NoUpdate)
+    return moved
+
+
+def move_to_front(widget: QListWidget, tiles: Dict[str, QListWidgetItem], keys: Sequence[str]) -> int:
+    """
+    Put the tiles of `keys` in the first rows, in that order; every other
+    tile keeps its relative order below them. Meant for a short prefix
+    (each lookup is a row search): only tiles not already in place move.
+    Returns the number of moved tiles.
+    """
+    cur = widget.currentItem()
+    moved = 0
+    for i, k in enumerate(dict.fromkeys(k for k in keys if k in tiles)):
+        li = tiles[k]
+        row = widget.row(li)
+        if row == i:
+            continue
+        selected = li.isSelected()
+        widget.insertItem(i, widget.takeItem(row))
+        if selected:
+            li.setSelected(True)
+        moved += 1
+    if moved and cur is not None:
+        widget.setCurrentItem(cur, QItemSelectionModel.NoUpdate)
+    return moved
+
+
+def merge_results(widget: QListWidget, ranker, batches: Iterable[Sequence[ImageItem]]) -> List[str]:
+    """
+    Merge provider batches into the gallery as they arrive, ranked by
+    `ranker` (a TopKRanker). While streaming only the top-k prefix is
+    reordered and every other tile stays where it is; the full order is
+    applied once, after the last batch. Tiles of results that are gone are
+    removed; returns their keys.
+    """
+    tiles = tiles_by_key(widget)
+    for batch in batches:
+        ranker.push(batch)
+        upsert_items(widget, batch, tiles)
+        move_to_front(widget, tiles, [item_key(it) for it in ranker.top()])
+    keys = [item_key(it) for it in ranker.ordered()]
+    removed = remove_missing(widget, keys)
+    apply_order(widget, keys)
+    return removed
+
+
+def _new_tile(it: ImageItem) -> QListWidgetItem:
+    li = QListWidgetItem()
+    li.setText("")
+    li.setToolTip(it.tooltip_text())
+    li.setIcon(_placeholder_icon(it.license_badge()))
+    li.setData(Qt.UserRole, it)
+    li.setData(KEY_ROLE, item_key(it))
+    return li
+
+
+def upsert_items(widget: QListWidget, items: Iterable[ImageItem],
+                 tiles: Optional[Dict[str, QListWidgetItem]] = None) -> List[str]:
+    """
+    Append tiles for unseen items and refresh the payload of known ones
+    (their loaded icon and selection are left alone). Returns the added keys.
+    `tiles` (from tiles_by_key) saves a scan of the gallery and is kept current.
+    """
+    widget.setIconSize(QSize(128, 128))
+    if tiles is None:
+        tiles = tiles_by_key(widget)
+    added = []
+    for it in items:
+        k = item_key(it)
+        li = tiles.get(k)
+        if li is None:
+            li = _new_tile(it)
+            widget.addItem(li)
+            tiles[k] = li
+            added.append(k)
+        else:
+            li.setData(Qt.UserRole, it)
+            li.setToolTip(it.tooltip_text())
+    return added
+
+
+def remove_missing(widget: QListWidget, keep: Iterable[str]) -> List[str]:
+    """Remove tiles whose item_key is not in `keep`; return the removed keys."""
+    keep = set(keep)
+    removed = []
+    for row in range(widget.count() - 1, -1, -1):
+        k = widget.item(row).data(KEY_ROLE)
+        if k not in keep:
+            widget.takeItem(row)
+            if k is not None:
+                removed.append(k)
+    return removed
+
+
+@lru_cache(maxsize=64)
 def _placeholder_icon(text: str, size: int = 128) -> QIcon:
-    """Create a simple square placeholder pixmap used as an icon."""
+    """Create a simple square placeholder pixmap used as an icon (shared per badge text)."""
     px = QPixmap(size, size)
     px.fill(QColor("#1A1F24"))
     painter = QPainter(px)
@@ -25,22 +192,6 @@ def _placeholder_icon(text: str, size: int = 128) -> QIcon:
     return QIcon(px)
 
 
-def render_items(widget: QListWidget, items: Iterable[ImageItem]) -> None:
-    """
-    Render ImageItem tiles into the gallery.
-    - Sets a placeholder icon (real thumbnails come later).
-    - Stores the ImageItem in UserRole so the UI can read it on selection.
-    """
-    widget.setIconSize(QSize(128, 128))
-    for it in items:
-        li = QListWidgetItem()
-        li.setText("")
-        li.setToolTip(it.tooltip_text())
-        li.setIcon(_placeholder_icon(it.license_badge()))
-        li.setData(Qt.UserRole, it)
-        widget.addItem(li)
-
-
 def bind_selection_changed(widget: QListWidget, callback: Callable[[Optional[ImageItem]], None]) -> None:
     """Call `callback(ImageItem|None)` whenever the current selection changes."""
     def _on_change(cur: QListWidgetItem, _prev: QListWidgetItem) -> None:
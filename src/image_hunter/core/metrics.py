@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Pipeline stages we time (keep names short; they become metric labels).
+# "network" is thumbnail fetches; "transfer" is full-size originals.
+STAGES = ("search", "render", "queue_wait", "network", "decode", "paint", "probe", "transfer")
+
+# Histogram bucket upper bounds, in milliseconds (last bucket is +Inf)
+BUCKETS_MS: Tuple[float, ...] = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def provider_label(model) -> str:
+    """Metric label for an ImageItem's provider ('unknown' if missing)."""
+    src = getattr(model, "source", None)
+    return src.name.lower() if src is not None else "unknown"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (not thread-safe; guarded by Metrics)."""
+
+    def __init__(self, bounds: Tuple[float, ...] = BUCKETS_MS) -> None:
+        self.bounds = bounds
+        self.counts: List[int] = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-quantile (0..1) as the upper bound of its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.total, 3),
+            "max_ms": round(self.max, 3),
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "buckets": {("+Inf" if i == len(self.bounds) else str(b)): c
+                        for i, (b, c) in enumerate(zip(self.bounds + (None,), self.counts))},
+        }
+
+
+class Metrics:
+    """
+    Per-stage latency histograms and per-provider error counters.
+    Safe to call from worker threads (downloads) and the UI thread (render/paint).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._hist: Dict[Tuple[str, str], Histogram] = {}   # (stage, provider) -> histogram
+        self._errors: Dict[Tuple[str, str], int] = {}       # (provider, kind) -> count
+
+    def observe(self, stage: str, ms: float, provider: str = "all") -> None:
+        """Record one duration (milliseconds) for a stage."""
+        with self._lock:
+            h = self._hist.get((stage, provider))
+            if h is None:
+                h = self._hist[(stage, provider)] = Histogram()
+            h.observe(ms)
+
+    @contextmanager
+    def timer(self, stage: str, provider: str = "all") -> Iterator[None]:
+        """Time the body of a `with` block into `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, (time.perf_counter() - start) * 1000.0, provider)
+
+    def error(self, provider: str, kind: str) -> None:
+        """Count one failure of the given kind (e.g. 'timeout', 'too_large')."""
+        with self._lock:
+            key = (provider, kind)
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def stage(self, stage: str, provider: Optional[str] = None) -> Histogram:
+        """Snapshot of a stage histogram, merged across providers if none is given."""
+        merged = Histogram()
+        with self._lock:
+            for (s, p), h in self._hist.items():
+                if s != stage or (provider is not None and p != provider):
+                    continue
+                merged.counts = [a + b for a, b in zip(merged.counts, h.counts)]
+                merged.count += h.count
+                merged.total += h.total
+                merged.max = max(merged.max, h.max)
+        return merged
+
+    def error_count(self, provider: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(n for (p, _k), n in self._errors.items() if provider is None or p == provider)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist.clear()
+            self._errors.clear()
+
+    # Export
+    def to_json(self) -> str:
+        with self._lock:
+            stages: Dict[str, Dict[str, dict]] = {}
+            for (s, p), h in sorted(self._hist.items()):
+                stages.setdefault(s, {})[p] = h.to_dict()
+            errors: Dict[str, Dict[str, int]] = {}
+            for (p, k), n in sorted(self._errors.items()):
+                errors.setdefault(p, {})[k] = n
+        return json.dumps({"unit": "ms", "stages": stages, "errors": errors}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (histograms are cumulative)."""
+        lines = [
+            "# HELP image_hunter_stage_latency_ms Pipeline stage latency in milliseconds.",
+            "# TYPE image_hunter_stage_latency_ms histogram",
+        ]
+        with self._lock:
+            for (s, p), h in sorted(self._hist.items()):
+                labels = f'stage="{s}",provider="{p}"'
+                cum = 0
+                for b, c in zip(h.bounds, h.counts):
+                    cum += c
+                    lines.append(f'image_hunter_stage_latency_ms_bucket{{{labels},le="{b:g}"}} {cum}')
+                lines.append(f'image_hunter_stage_latency_ms_bucket{{{labels},le="+Inf"}} {h.count}')
+                lines.append(f"image_hunter_stage_latency_ms_sum{{{labels}}} {h.total:.3f}")
+                lines.append(f"image_hunter_stage_latency_ms_count{{{labels}}} {h.count}")
+            lines.append("# HELP image_hunter_errors_total Failures by provider and kind.")
+            lines.append("# TYPE image_hunter_errors_total counter")
+            for (p, k), n in sorted(self._errors.items()):
+                lines.append(f'image_hunter_errors_total{{provider="{p}",kind="{k}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by the loaders and the UI
+METRICS = Metrics()
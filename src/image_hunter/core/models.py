@@ -110,3 +110,8 @@ class ImageItem:
             f"License: {self.license_badge()}\n"
             f"Dimensions: {wh}"
         )
+
+
+def item_key(item: ImageItem) -> str:
+    """Stable key for a result across searches (ids are only unique per provider)."""
+    return f"{item.source.name.lower()}:{item.id}"
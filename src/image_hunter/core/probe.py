@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import json
+import struct
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from .download import error_kind
+from .executors import io_executor
+from .filelock import update_json
+from .metrics import METRICS, provider_label
+from .models import ImageItem
+
+# Header-only size probing: read the first few KB of an image and parse its
+# dimensions, so quality filters work without fetching whole originals.
+# Shared by the GUI and the headless CLI (no Qt imports here)
+
+PROBE_BYTES = 16 * 1024         # enough for PNG/GIF/WebP and most JPEGs
+PROBE_MAX_BYTES = 256 * 1024    # JPEGs with large EXIF/ICC blocks push SOF further in
+MISS_TTL = 24 * 3600            # seconds before a failed/unknown URL is probed again
+
+Size = Tuple[int, int]
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, ...; not DHT/JPG/DAC)
+_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _exif_orientation(seg: bytes) -> int:
+    """EXIF Orientation (1-8) from an APP1 payload, 1 if absent or unreadable."""
+    if seg[:6] != b"Exif\0\0":
+        return 1
+    tiff = seg[6:]
+    order = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if order is None or len(tiff) < 8:
+        return 1
+    ifd = struct.unpack(order + "I", tiff[4:8])[0]
+    if ifd + 2 > len(tiff):
+        return 1
+    count = struct.unpack(order + "H", tiff[ifd:ifd + 2])[0]
+    for n in range(count):
+        entry = ifd + 2 + n * 12
+        if entry + 12 > len(tiff):
+            break
+        tag, typ = struct.unpack(order + "HH", tiff[entry:entry + 4])
+        if tag == 0x0112 and typ == 3:  # Orientation, SHORT
+            value = struct.unpack(order + "H", tiff[entry + 8:entry + 10])[0]
+            return value if 1 <= value <= 8 else 1
+    return 1
+
+
+def _jpeg_size(b: bytes) -> Optional[Size]:
+    i = 2
+    orientation = 1
+    while i + 4 <= len(b):
+        if b[i] != 0xFF:
+            return None  # lost sync: not a marker where one should be
+        marker = b[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:  # standalone markers
+            i += 2
+            continue
+        seg_len = struct.unpack(">H", b[i + 2:i + 4])[0]
+        if marker == 0xE1 and i + 2 + seg_len <= len(b):
+            orientation = _exif_orientation(b[i + 4:i + 2 + seg_len])
+        if marker in _SOF:
+            if i + 9 > len(b):
+                return None
+            h, w = struct.unpack(">HH", b[i + 5:i + 9])
+            if not (w and h):
+                return None
+            # Orientations 5-8 rotate by 90°: report the size as displayed
+            return (h, w) if orientation >= 5 else (w, h)
+        i += 2 + seg_len
+    return None
+
+
+def _webp_size(b: bytes) -> Optional[Size]:
+    chunk = b[12:16]
+    if chunk == b"VP8X" and len(b) >= 30:
+        w = int.from_bytes(b[24:27], "little") + 1
+        h = int.from_bytes(b[27:30], "little") + 1
+        return w, h
+    if chunk == b"VP8L" and len(b) >= 25 and b[20] == 0x2F:
+        bits = int.from_bytes(b[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8 " and len(b) >= 30 and b[23:26] == b"\x9d\x01\x2a":
+        w, h = struct.unpack("<HH", b[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    return None
+
+
+def parse_size(head: bytes) -> Optional[Size]:
+    """
+    (width, height) from the start of a JPEG, PNG, GIF or WebP file, or None
+    if the format is unknown or the header isn't fully contained in `head`.
+    """
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR" and len(head) >= 24:
+        return struct.unpack(">II", head[16:24])
+    if head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+        return struct.unpack("<HH", head[6:10])
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return _webp_size(head)
+    if head[:2] == b"\xff\xd8":
+        return _jpeg_size(head)
+    return None
+
+
+def fetch_head(url: str, n: int = PROBE_BYTES, timeout: float = 10.0,
+               user_agent: str = "ImageHunter/0.1 (probe)") -> bytes:
+    """First `n` bytes of `url` (Range request; servers that ignore it are cut off at `n`)."""
+    req = urllib.request.Request(url, headers={
+        "User-Agent": user_agent,
+        "Accept": "image/*,*/*;q=0.8",
+        "Range": f"bytes=0-{n - 1}",
+    })
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return resp.read(n)
+
+
+def probe_size(url: str, timeout: float = 10.0) -> Optional[Size]:
+    """Image dimensions of `url` from its header, reading at most PROBE_MAX_BYTES."""
+    head = fetch_head(url, PROBE_BYTES, timeout)
+    size = parse_size(head)
+    if size is None and head[:2] == b"\xff\xd8" and len(head) == PROBE_BYTES:
+        # JPEG whose frame header lies past the first read; try once more, wider
+        size = parse_size(fetch_head(url, PROBE_MAX_BYTES, timeout))
+    return size
+
+
+def default_index_file() -> Path:
+    """<repo>/thumbnails/dimensions.json (next to the thumbnail cache)"""
+    return Path(__file__).resolve().parents[2] / "thumbnails" / "dimensions.json"
+
+
+class DimensionIndex:
+    """
+    Persistent url -> (width, height) map, so every URL is probed once.
+    URLs whose header was read but gave no size (unknown format, truncated
+    header) are remembered as misses and not probed again for MISS_TTL
+    seconds. Network errors are not recorded; the next run retries them.
+
+    Thread-safe; call save() after a batch of put()s. The file may be shared
+    by several processes: save() merges with what is on disk under a lock
+    file, so concurrent writers don't drop each other's entries.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path or default_index_file()
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        self._sizes, self._misses = self._parse(data)
+
+    @staticmethod
+    def _parse(data: dict) -> Tuple[Dict[str, Size], Dict[str, float]]:
+        try:
+            sizes = {u: (int(w), int(h)) for u, (w, h) in data.get("sizes", {}).items()}
+            misses = {u: float(ts) for u, ts in data.get("misses", {}).items()}
+            return sizes, misses
+        except (ValueError, TypeError, AttributeError):
+            return {}, {}
+
+    def get(self, url: str) -> Optional[Size]:
+        with self._lock:
+            return self._sizes.get(url)
+
+    def missed(self, url: str) -> bool:
+        """True if `url` gave no size less than MISS_TTL seconds ago."""
+        with self._lock:
+            return time.time() - self._misses.get(url, 0.0) < MISS_TTL
+
+    def put(self, url: str, size: Size) -> None:
+        with self._lock:
+            self._misses.pop(url, None)
+            if self._sizes.get(url) != size:
+                self._sizes[url] = size
+                self._dirty = True
+
+    def put_miss(self, url: str) -> None:
+        with self._lock:
+            self._misses[url] = time.time()
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            update_json(self.path, self._merge)
+            self._dirty = False
+
+    def _merge(self, data: dict) -> dict:
+        # Called by update_json under the file lock, with self._lock held
+        sizes, misses = self._parse(data)
+        sizes.update(self._sizes)
+        misses.update(self._misses)
+        now = time.time()
+        self._sizes = sizes
+        self._misses = {u: ts for u, ts in misses.items() if u not in sizes and now - ts < MISS_TTL}
+        return {"version": 1, "sizes": self._sizes, "misses": self._misses}
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+
+def _probe_one(item: ImageItem, timeout: float) -> Tuple[bool, Optional[Size]]:
+    """(header was read, size or None if it couldn't be parsed)"""
+    start = time.perf_counter()
+    try:
+        size = probe_size(item.image_url, timeout)
+    except Exception as e:  # probing is best effort; the item just stays unknown
+        METRICS.error(provider_label(item), error_kind(e))
+        return False, None
+    METRICS.observe("probe", (time.perf_counter() - start) * 1000.0, provider_label(item))
+    return True, size
+
+
+def probe_items(items: Iterable[ImageItem], index: Optional[DimensionIndex] = None,
+                timeout: float = 10.0) -> int:
+    """
+    Fill in missing width/height of `items` in place, from the index or by
+    probing image headers concurrently on the I/O executor. Returns how many
+    items gained dimensions. Blocks until every probe has finished.
+    """
+    filled = 0
+    io = io_executor()
+    futures: Dict[Future, ImageItem] = {}
+    for it in items:
+        if (it.width and it.height) or not it.image_url:
+            continue
+        known = index.get(it.image_url) if index is not None else None
+        if known is not None:
+            it.width, it.height = known
+            filled += 1
+            continue
+        if index is not None and index.missed(it.image_url):
+            continue
+        # Blocks while the I/O queue is full
+        futures[io.submit(_probe_one, it, timeout)] = it
+    for fut, it in futures.items():
+        fetched, size = fut.result()
+        if size is None:
+            # Only a header we read but can't parse is a miss; network errors
+            # (refused, timeout, 5xx) are transient and retried next run
+            if fetched and index is not None:
+                index.put_miss(it.image_url)
+            continue
+        it.width, it.height = size
+        filled += 1
+        if index is not None:
+            index.put(it.image_url, size)
+    if index is not None:
+        index.save()
+    return filled
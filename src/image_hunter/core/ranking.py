@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+from .models import ImageItem, License, Source
+
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# How "free" each license is for reuse (PD first, attribution next, provider terms last)
+LICENSE_SCORE = {
+    License.PD_CC0: 1.0,
+    License.CC_BY: 0.7,
+    License.CC_BY_SA: 0.6,
+    License.UNSPLASH: 0.5,
+    License.PEXELS: 0.5,
+    License.PIXABAY: 0.5,
+    License.OTHER: 0.3,
+}
+
+
+def _terms(text: str) -> set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+@dataclass
+class RankWeights:
+    """Relative weight of each signal (scores are summed, then scaled by provider)."""
+    title: float = 3.0
+    tags: float = 2.0
+    resolution: float = 1.0
+    license: float = 1.0
+    providers: Dict[Source, float] = field(default_factory=dict)  # multiplier, default 1.0
+
+
+def score(item: ImageItem, query_terms: set[str], weights: RankWeights) -> float:
+    """Relevance of one item for the query (higher is better)."""
+    s = 0.0
+    if query_terms:
+        s += weights.title * len(query_terms & _terms(item.title or "")) / len(query_terms)
+        if item.tags:
+            tag_terms = set().union(*(_terms(t) for t in item.tags))
+            s += weights.tags * len(query_terms & tag_terms) / len(query_terms)
+    if item.width and item.height:
+        # log scale: 1 MP ~ 0.2, 24 MP and up ~ 1.0
+        mp = item.width * item.height / 1_000_000
+        s += weights.resolution * min(1.0, math.log2(mp + 1) / math.log2(25))
+    s += weights.license * LICENSE_SCORE.get(item.license, 0.0)
+    return s * weights.providers.get(item.source, 1.0)
+
+
+class TopKRanker:
+    """
+    Rank results as they stream in from providers.
+
+    Keeps a min-heap of the best `k` items seen so far, so the first screen
+    can show the best results so far without sorting everything on every
+    batch: use top() while results stream in, and ordered() once, after
+    finish(). Items that fall out of the heap wait unsorted until then.
+    """
+
+    def __init__(self, query: str, k: int = 60, weights: RankWeights | None = None) -> None:
+        self.k = max(1, k)
+        self.weights = weights or RankWeights()
+        self._terms = _terms(query)
+        self._seq = itertools.count()
+        self._heap: List[Tuple[float, int, ImageItem]] = []   # (score, -seq, item); root = weakest
+        self._rest: List[Tuple[float, int, ImageItem]] = []
+        self._finished = False
+
+    def push(self, items: Iterable[ImageItem]) -> None:
+        """Score and merge one batch of results."""
+        for it in items:
+            entry = (score(it, self._terms, self.weights), -next(self._seq), it)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+            elif entry[:2] > self._heap[0][:2]:
+                self._rest.append(heapq.heapreplace(self._heap, entry))
+            else:
+                self._rest.append(entry)
+        self._finished = False
+
+    def top(self) -> List[ImageItem]:
+        """Current top-k, best first (ties keep arrival order)."""
+        return [e[2] for e in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+    def finish(self) -> None:
+        """Sort the items outside the top-k (call once the stream is complete)."""
+        self._rest.sort(key=lambda e: e[:2], reverse=True)
+        self._finished = True
+
+    def ordered(self) -> List[ImageItem]:
+        """Every item, best first. Sorts all of them, so it finishes the stream if needed."""
+        if not self._finished:
+            self.finish()
+        return self.top() + [e[2] for e in self._rest]
+
+    def __len__(self) -> int:
+        return len(self._heap) + len(self._rest)
@@ -1,18 +1,43 @@
 from __future__ import annotations
 
 import hashlib
-import os
-import urllib.request
-from dataclasses import dataclass
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Deque, Iterable, Optional
 
-from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+from PySide6.QtGui import QImage
 
+from .download import error_kind, fetch_cached
+from .executors import cpu_executor, io_executor
+from .metrics import METRICS, provider_label
+from .models import item_key
 
-# Cache directory: <repo>/thumbnails
+
+# Cache directory: <repo>/thumbnails (created lazily, off the startup path)
 CACHE_DIR = Path(__file__).resolve().parents[2] / "thumbnails"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+# Full-size originals fetched for the zoom viewer live next to it
+ORIGINALS_DIR = CACHE_DIR.parent / "originals"
+_ready_dirs: set[Path] = set()
+
+# Decoded thumbnails are capped at this many pixels on the longest side
+THUMB_SIDE = 256
+
+# Results are handed to the UI at most once per frame, within a time budget
+FRAME_MS = 16
+FRAME_BUDGET_MS = 6.0
+
+
+def ensure_cache_dir(path: Optional[Path] = None) -> Path:
+    """Create the cache directory (default: CACHE_DIR) on first use and return it."""
+    d = path or CACHE_DIR
+    if d not in _ready_dirs:
+        d.mkdir(parents=True, exist_ok=True)
+        _ready_dirs.add(d)
+    return d
 
 
 def _hash_name(url: str) -> str:
@@ -20,94 +45,286 @@ def _hash_name(url: str) -> str:
     return hashlib.sha1(url.encode("utf-8")).hexdigest() + ".img"
 
 
+def cached_path(url: str, cache_dir: Optional[Path] = None) -> Path:
+    """Where `url` is (or will be) cached inside `cache_dir` (default: CACHE_DIR)."""
+    return (cache_dir or CACHE_DIR) / _hash_name(url)
+
+
 @dataclass
 class _Job:
-    index: int
+    key: str                # models.item_key of the tile
     url: str
     path: Path
+    provider: str = "unknown"
+    generation: int = 0
+    queued_at: float = field(default_factory=time.perf_counter)
 
 
 class _Signals(QObject):
-    """Qt signals for loader results."""
-    loaded = Signal(int, str)   # index, file path
-    failed = Signal(int, str)   # index, reason
+    """Qt signals for loader results (emitted on the UI thread, one batch per frame)."""
+    results = Signal(list, list)   # [(item key, url, file path, QImage)], [(item key, reason)]
+    _wake = Signal()               # worker -> UI thread: first result since the last flush
 
 
-class _Task(QRunnable):
-    """Background task: download a single thumbnail to cache."""
-    def __init__(self, job: _Job, signals: _Signals, timeout: float = 10.0, max_bytes: int = 5_000_000) -> None:
-        super().__init__()
-        self.job = job
-        self.signals = signals
-        self.timeout = timeout
-        self.max_bytes = max_bytes
+def decode_thumbnail(path: str, max_side: int = THUMB_SIDE) -> QImage:
+    """Decode an image file and downscale it to at most `max_side` px (thread-safe)."""
+    img = QImage(path)
+    if not img.isNull() and max(img.width(), img.height()) > max_side:
+        img = img.scaled(max_side, max_side, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return img
 
-    def run(self) -> None:
-        # If already cached, emit immediately
-        if self.job.path.is_file():
-            self.signals.loaded.emit(self.job.index, str(self.job.path))
-            return
 
-        # Prepare request (polite headers)
-        req = urllib.request.Request(
-            self.job.url,
-            headers={
-                "User-Agent": "ImageHunter/0.1 (thumb-loader)",
-                "Accept": "image/*,*/*;q=0.8",
-            },
-        )
-        try:
-            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
-                # Basic size guard (if server provides Content-Length)
-                length = resp.headers.get("Content-Length")
-                if length and int(length) > self.max_bytes:
-                    self.signals.failed.emit(self.job.index, "Content too large")
-                    return
+def image_to_raw(img: QImage) -> Optional[tuple]:
+    """(width, height, bytes per line, format, pixels): a QImage that can be pickled."""
+    if img.isNull():
+        return None
+    return img.width(), img.height(), img.bytesPerLine(), img.format().value, bytes(img.constBits())
 
-                # Stream to temp then move (atomic-ish)
-                tmp = self.job.path.with_suffix(".tmp")
-                with open(tmp, "wb") as f:
-                    read = 0
-                    while True:
-                        chunk = resp.read(64 * 1024)
-                        if not chunk:
-                            break
-                        read += len(chunk)
-                        if read > self.max_bytes:
-                            f.close()
-                            tmp.unlink(missing_ok=True)
-                            self.signals.failed.emit(self.job.index, "Exceeded max size")
-                            return
-                        f.write(chunk)
-                os.replace(tmp, self.job.path)
-                self.signals.loaded.emit(self.job.index, str(self.job.path))
-        except Exception as e:  # network errors, timeouts, etc.
-            self.signals.failed.emit(self.job.index, str(e))
+
+def image_from_raw(raw: Optional[tuple]) -> QImage:
+    """Inverse of image_to_raw() (null image for None)."""
+    if raw is None:
+        return QImage()
+    w, h, bpl, fmt, data = raw
+    return QImage(data, w, h, bpl, QImage.Format(fmt)).copy()  # copy: own the pixels
+
+
+def _decode_task(path: str, raw: bool):
+    """
+    CPU pool task (module level, so a process pool can pickle it): decoded
+    thumbnail and decode time in ms. With raw=True the image travels as
+    image_to_raw() data, since QImage can't cross a process boundary.
+    """
+    start = time.perf_counter()
+    img = decode_thumbnail(path)
+    ms = (time.perf_counter() - start) * 1000.0
+    return (image_to_raw(img) if raw else img), ms
 
 
 class ThumbLoader(QObject):
-    """Schedule thumbnail downloads and emit results back to the UI thread."""
-    def __init__(self, parent: Optional[QObject] = None, max_workers: int = 6) -> None:
+    """
+    Schedule thumbnail downloads and emit results back to the UI thread.
+
+    Downloads run on the shared I/O executor and decoding on the CPU executor,
+    so neither touches QThreadPool.globalInstance(). At most `max_workers`
+    downloads from this loader are in flight; the rest wait in a local queue
+    and are fed in as slots free up (backpressure instead of flooding the pool).
+
+    load_for_list() replaces all outstanding work; load_items()/forget() adjust
+    it incrementally, so a refined search only loads tiles that are new.
+
+    Workers don't signal per thumbnail: results collect in an outbox that the
+    UI thread drains once per frame, as one `results` batch sized to fit
+    `frame_budget_ms` (measured on the previous batches' handlers).
+    """
+    def __init__(self, parent: Optional[QObject] = None, max_workers: int = 6,
+                 cache_dir: Optional[Path] = None, timeout: float = 10.0,
+                 max_bytes: int = 5_000_000) -> None:
         super().__init__(parent)
-        self.pool = QThreadPool.globalInstance()
-        self.pool.setMaxThreadCount(max_workers)
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
         self.signals = _Signals()
+        self._lock = threading.Lock()
+        self._pending: Deque[_Job] = deque()
+        self._decoding: Deque[_Job] = deque()   # downloaded, waiting for a CPU slot
+        self._cpu_waiting = False               # a notify_when_free callback is registered
+        self._active = 0
+        self._generation = 0
+        self._wanted: set[str] = set()     # keys whose results are still wanted
+        self._queued: set[str] = set()     # keys waiting or downloading
+        # Outbox of finished jobs, drained on the UI thread by _flush()
+        self.frame_budget_ms = FRAME_BUDGET_MS
+        self._outbox: Deque[tuple] = deque()   # (job, path, image) or (job, None, reason)
+        self._item_ms = 0.5                    # running estimate of handler cost per result
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FRAME_MS)
+        self._flush_timer.timeout.connect(self._flush)
+        self.signals._wake.connect(self._flush_timer.start)
 
     def load_for_list(self, list_widget) -> None:
         """
         Iterate items in a QListWidget, read each ImageItem from UserRole,
-        and schedule thumbnail downloads.
+        and schedule thumbnail downloads. Work still queued from a previous
+        call is dropped, and its late results are ignored.
+        """
+        self.cancel()
+        models = (list_widget.item(i).data(Qt.UserRole) for i in range(list_widget.count()))
+        self.load_items(models)
+
+    def load_items(self, models: Iterable) -> None:
+        """
+        Schedule thumbnails for `models` on top of the current work; keys that
+        are already queued or downloading are not scheduled twice.
         """
-        from PySide6.QtCore import Qt  # local import to avoid hard dep here
-        count = list_widget.count()
-        for i in range(count):
-            item = list_widget.item(i)
-            model = item.data(Qt.UserRole)
-            if not model or not getattr(model, "thumbnail_url", None):
+        jobs = []
+        with self._lock:
+            gen = self._generation
+            for model in models:
+                if not model or not getattr(model, "thumbnail_url", None):
+                    continue
+                key = item_key(model)
+                self._wanted.add(key)
+                if key in self._queued:
+                    continue
+                self._queued.add(key)
+                url = model.thumbnail_url
+                path = cached_path(url, self.cache_dir)
+                jobs.append(_Job(key=key, url=url, path=path, provider=provider_label(model), generation=gen))
+            self._pending.extend(jobs)
+        self._pump()
+
+    def forget(self, keys: Iterable[str]) -> None:
+        """Stop loading `keys` (tiles that left the gallery); late results are ignored."""
+        with self._lock:
+            self._wanted.difference_update(keys)
+            kept = [j for j in self._pending if j.key in self._wanted]
+            for j in self._pending:
+                if j.key not in self._wanted:
+                    self._queued.discard(j.key)
+            self._pending = deque(kept)
+
+    def cancel(self) -> None:
+        """Drop queued jobs and ignore results of in-flight ones."""
+        with self._lock:
+            self._generation += 1
+            self._pending.clear()
+            self._decoding.clear()
+            self._wanted.clear()
+            self._queued.clear()
+            self._outbox.clear()
+
+    def _pump(self) -> None:
+        # Feed queued jobs into the I/O pool while both we and the pool have room
+        io = io_executor()
+        while True:
+            with self._lock:
+                if not self._pending or self._active >= self.max_workers:
+                    return
+                job = self._pending.popleft()
+                self._active += 1
+            if io.try_submit(self._run, job) is None:
+                with self._lock:
+                    self._active -= 1
+                    self._pending.appendleft(job)
+                io.notify_when_free(self._pump)  # shared pool is full; retry when a slot frees
+                return
+
+    def _stale(self, job: _Job) -> bool:
+        return job.generation != self._generation or job.key not in self._wanted
+
+    def _run(self, job: _Job) -> None:
+        # I/O worker: download (unless cached), then hand decoding to the CPU pool
+        try:
+            self._download(job)
+        finally:
+            with self._lock:
+                self._active -= 1
+                if job.generation == self._generation:
+                    self._queued.discard(job.key)
+            self._pump()
+
+    def _download(self, job: _Job) -> None:
+        METRICS.observe("queue_wait", (time.perf_counter() - job.queued_at) * 1000.0, job.provider)
+        if self._stale(job):
+            return
+
+        if not job.path.is_file():
+            # First write into the cache happens here, on a worker thread. The cache
+            # is shared by every instance on the host: one process downloads a
+            # URL, the others wait on its lock and then read the file.
+            ensure_cache_dir(job.path.parent)
+            start = time.perf_counter()
+            try:
+                n = fetch_cached(job.url, job.path, lock_timeout=self.timeout * 3, timeout=self.timeout,
+                                 max_bytes=self.max_bytes, user_agent="ImageHunter/0.1 (thumb-loader)")
+            except Exception as e:  # size guard, network errors, timeouts, etc.
+                self._fail(job, error_kind(e), str(e))
+                return
+            if n is not None:
+                METRICS.observe("network", (time.perf_counter() - start) * 1000.0, job.provider)
+
+        # Hand over to the CPU pool without blocking this I/O thread
+        with self._lock:
+            self._decoding.append(job)
+        self._pump_decode()
+
+    def _pump_decode(self) -> None:
+        # Feed downloaded files into the CPU pool while it has room
+        cpu = cpu_executor()
+        while True:
+            with self._lock:
+                if not self._decoding:
+                    return
+                job = self._decoding.popleft()
+            if self._stale(job):
                 continue
-            url = model.thumbnail_url
-            path = CACHE_DIR / _hash_name(url)
-            job = _Job(index=i, url=url, path=path)
-            # If cached, short-circuit via a tiny task (still async)
-            task = _Task(job, self.signals)
-            self.pool.start(task)
+            fut = cpu.try_submit(_decode_task, str(job.path), cpu.processes)
+            if fut is None:
+                with self._lock:
+                    self._decoding.appendleft(job)
+                    if self._cpu_waiting:
+                        return
+                    self._cpu_waiting = True
+                cpu.notify_when_free(self._on_cpu_free)  # retry when a CPU slot frees
+                return
+            fut.add_done_callback(lambda f, job=job, raw=cpu.processes: self._decoded(job, f, raw))
+
+    def _on_cpu_free(self) -> None:
+        with self._lock:
+            self._cpu_waiting = False
+        self._pump_decode()
+
+    def _decoded(self, job: _Job, fut, raw: bool) -> None:
+        # Runs on the thread that finished the task (or the pool's result thread)
+        if fut.cancelled():
+            return
+        try:
+            result, ms = fut.result()
+        except Exception as e:  # e.g. a crashed worker process
+            self._fail(job, error_kind(e), str(e))
+            return
+        METRICS.observe("decode", ms, job.provider)
+        img = image_from_raw(result) if raw else result
+        if img.isNull():
+            self._fail(job, "decode", "Could not decode image")
+            return
+        self._post(job, str(job.path), img)
+
+    def _fail(self, job: _Job, kind: str, reason: str) -> None:
+        METRICS.error(job.provider, kind)
+        self._post(job, None, reason)
+
+    def _post(self, job: _Job, path: Optional[str], payload) -> None:
+        # Worker thread: queue a result; only the first one per frame wakes the UI thread
+        if self._stale(job):
+            return
+        with self._lock:
+            wake = not self._outbox
+            self._outbox.append((job, path, payload))
+        if wake:
+            self.signals._wake.emit()
+
+    def _flush(self) -> None:
+        # UI thread: deliver as many results as fit in the frame budget, in one batch
+        n = max(1, int(self.frame_budget_ms / self._item_ms))
+        loaded, failed = [], []
+        with self._lock:
+            while self._outbox and len(loaded) + len(failed) < n:
+                job, path, payload = self._outbox.popleft()
+                if self._stale(job):
+                    continue
+                if path is None:
+                    failed.append((job.key, payload))
+                else:
+                    loaded.append((job.key, job.url, path, payload))
+            more = bool(self._outbox)
+        if loaded or failed:
+            start = time.perf_counter()
+            self.signals.results.emit(loaded, failed)
+            per_item = (time.perf_counter() - start) * 1000.0 / (len(loaded) + len(failed))
+            self._item_ms = max(0.01, 0.7 * self._item_ms + 0.3 * per_item)
+        if more:
+            self._flush_timer.start()  # rest goes out next frame
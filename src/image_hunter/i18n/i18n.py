@@ -4,6 +4,7 @@ from typing import Dict
 
 _current: Dict[str, str] = {}
 _fallback: Dict[str, str] = {}
+_catalogs: Dict[str, Dict[str, str]] = {}  # lang -> parsed catalog (read once per process)
 
 SUPPORTED = {
     "en": "English",
@@ -12,13 +13,20 @@ SUPPORTED = {
     "fr": "Français",
 }
 
+def _catalog(lang: str) -> Dict[str, str] | None:
+    """Return the parsed catalog for `lang` (cached), or None if there is no such file."""
+    if lang not in _catalogs:
+        p = pkg.files(__package__).joinpath(f"{lang}.json")
+        if not p.is_file():
+            return None
+        _catalogs[lang] = json.loads(p.read_text(encoding="utf-8"))
+    return _catalogs[lang]
+
 def load(lang: str = "en") -> None:
     """Load translation JSON. Falls back to English if missing."""
     global _current, _fallback
-    with pkg.files(__package__).joinpath("en.json").open("r", encoding="utf-8") as f:
-        _fallback = json.load(f)
-    p = pkg.files(__package__).joinpath(f"{lang}.json")
-    _current = _fallback if not p.is_file() else json.loads(p.read_text(encoding="utf-8"))
+    _fallback = _catalog("en") or {}
+    _current = _catalog(lang) or _fallback
 
 def t(key: str, **kwargs) -> str:
     s = _current.get(key, _fallback.get(key, key))
@@ -0,0 +1,56 @@
+from __future__ import annotations
+"""Startup profiling helpers (enabled with `--profile-startup`).
+
+Records wall-clock time for named startup stages and prints a small report
+once the first window has been painted. When disabled every call is a no-op,
+so the normal startup path pays nothing for it.
+
+Times are relative to the import of this module, which image_hunter.app
+imports first. Interpreter start-up comes before that and is not included
+(about 15 ms on a typical Linux box).
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, TextIO, Tuple
+
+# Entry-point time: the reference for time-to-first-window
+_T0 = time.perf_counter()
+
+
+class StartupProfiler:
+    """Collect (stage, milliseconds) pairs; elapsed time counts from the entry point."""
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._t0 = _T0
+        self._stages: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the body of a `with` block as one stage."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stages.append((name, (time.perf_counter() - start) * 1000.0))
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the entry point was imported."""
+        return (time.perf_counter() - self._t0) * 1000.0
+
+    def report(self, out: TextIO | None = None) -> None:
+        """Print every stage plus the total time to first window."""
+        if not self.enabled:
+            return
+        out = out or sys.stderr
+        width = max((len(n) for n, _ in self._stages), default=0)
+        out.write("[startup] stage timings\n")
+        for name, ms in self._stages:
+            out.write(f"  {name:<{width}}  {ms:8.1f} ms\n")
+        out.write(f"  {'time-to-first-window':<{width}}  {self.elapsed_ms():8.1f} ms\n")
+        out.flush()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QPushButton,
+    QLabel, QSpinBox, QAbstractItemView,
+)
+
+from image_hunter.i18n.i18n import t
+from image_hunter.core.download_queue import DownloadQueue, QueueEntry
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1_000_000:.1f}"
+
+
+class DownloadsDialog(QDialog):
+    """Non-modal view of the download queue (pause/resume, priority, bandwidth cap)."""
+
+    def __init__(self, parent, queue: DownloadQueue, rate_kbps: int = 0) -> None:
+        super().__init__(parent)
+        self.setWindowTitle(t("downloads.title"))
+        self._queue = queue
+        self._rows: dict[str, QListWidgetItem] = {}
+
+        self.list = QListWidget()
+        self.list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+
+        self.btn_pause = QPushButton(t("downloads.pause"))
+        self.btn_resume = QPushButton(t("downloads.resume"))
+        self.btn_up = QPushButton(t("downloads.up"))
+        self.btn_down = QPushButton(t("downloads.down"))
+        self.btn_remove = QPushButton(t("downloads.remove"))
+        self.btn_pause_all = QPushButton(t("downloads.pause_all"))
+        self.btn_resume_all = QPushButton(t("downloads.resume_all"))
+        self.btn_clear = QPushButton(t("downloads.clear_finished"))
+
+        # Ids are collected first: the queue's `changed` rebuilds the list
+        self.btn_pause.clicked.connect(lambda: queue.pause_many(self._selected_ids()))
+        self.btn_resume.clicked.connect(lambda: queue.resume_many(self._selected_ids()))
+        self.btn_up.clicked.connect(lambda: queue.move_many(self._selected_ids(), +1))
+        self.btn_down.clicked.connect(lambda: queue.move_many(self._selected_ids(), -1))
+        self.btn_remove.clicked.connect(lambda: queue.remove_many(self._selected_ids()))
+        self.btn_pause_all.clicked.connect(queue.pause_all)
+        self.btn_resume_all.clicked.connect(queue.resume_all)
+        self.btn_clear.clicked.connect(queue.clear_finished)
+
+        # Global bandwidth cap (KB/s, 0 = unlimited)
+        self.rate = QSpinBox()
+        self.rate.setRange(0, 1_000_000)
+        self.rate.setSingleStep(100)
+        self.rate.setSuffix(" KB/s")
+        self.rate.setSpecialValueText(t("downloads.unlimited"))
+        self.rate.setValue(rate_kbps)
+
+        # Layout
+        lay = QVBoxLayout(self)
+        lay.addWidget(self.list, 1)
+        row = QHBoxLayout()
+        for b in (self.btn_pause, self.btn_resume, self.btn_up, self.btn_down, self.btn_remove):
+            row.addWidget(b)
+        row.addStretch(1)
+        lay.addLayout(row)
+        bar = QHBoxLayout()
+        bar.addWidget(QLabel(t("downloads.bandwidth")))
+        bar.addWidget(self.rate)
+        bar.addStretch(1)
+        for b in (self.btn_pause_all, self.btn_resume_all, self.btn_clear):
+            bar.addWidget(b)
+        lay.addLayout(bar)
+
+        queue.changed.connect(self._on_changed)
+        queue.progress.connect(self._on_progress)
+        self._rebuild()
+        self.resize(720, 420)
+
+    def _selected_ids(self) -> list[str]:
+        return [li.data(Qt.UserRole) for li in self.list.selectedItems()]
+
+    def _text(self, e: QueueEntry) -> str:
+        size = f"{_mb(e.bytes_done)}/{_mb(e.total)} MB" if e.total else (f"{_mb(e.bytes_done)} MB" if e.bytes_done else "")
+        parts = [e.title or e.url, t(f"downloads.status.{e.status}")]
+        if size:
+            parts.append(size)
+        if e.priority:
+            parts.append(f"P{e.priority:+d}")
+        if e.error:
+            parts.append(e.error)
+        return "  •  ".join(parts)
+
+    def _rebuild(self) -> None:
+        selected = {li.data(Qt.UserRole) for li in self.list.selectedItems()}
+        self.list.clear()
+        self._rows.clear()
+        for e in self._queue.entries():
+            li = QListWidgetItem(self._text(e))
+            li.setData(Qt.UserRole, e.id)
+            li.setToolTip(e.dest)
+            self.list.addItem(li)
+            li.setSelected(e.id in selected)
+            self._rows[e.id] = li
+
+    def _on_changed(self, entry_id: str) -> None:
+        li = self._rows.get(entry_id)
+        e = self._queue.get(entry_id)
+        if entry_id and li is not None and e is not None:
+            li.setText(self._text(e))
+        else:
+            self._rebuild()
+
+    def _on_progress(self, entry_id: str, _done: int, _total: int) -> None:
+        li = self._rows.get(entry_id)
+        e = self._queue.get(entry_id)
+        if li is not None and e is not None:
+            li.setText(self._text(e))
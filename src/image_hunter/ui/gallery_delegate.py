@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import time
+
 from PySide6.QtCore import Qt, QSize, QRect
 from PySide6.QtGui import QPainter, QColor, QFont, QPen, QIcon, QPixmap
 from PySide6.QtWidgets import (
@@ -9,6 +11,7 @@ from PySide6.QtWidgets import (
     QStyle,
 )
 
+from image_hunter.core.metrics import METRICS, provider_label
 
 
 class GalleryDelegate(QStyledItemDelegate):
@@ -22,6 +25,11 @@ class GalleryDelegate(QStyledItemDelegate):
         self.radius = 8
 
     def paint(self, painter: QPainter, option: QStyleOptionViewItem, index) -> None:
+        start = time.perf_counter()
+        self._paint_tile(painter, option, index)
+        METRICS.observe("paint", (time.perf_counter() - start) * 1000.0, provider_label(index.data(Qt.UserRole)))
+
+    def _paint_tile(self, painter: QPainter, option: QStyleOptionViewItem, index) -> None:
         r = option.rect.adjusted(4, 4, -4, -4)
 
         # Background card
@@ -1,20 +1,22 @@
 from __future__ import annotations
 
-from PySide6.QtCore import Qt, QSettings, QUrl, QSize
-from PySide6.QtGui import QAction, QActionGroup, QDesktopServices, QPixmap
+import time
+
+from PySide6.QtCore import Qt, QSettings, QUrl, QSize, QTimer
+from PySide6.QtGui import QAction, QActionGroup, QDesktopServices, QIcon, QImage, QPixmap
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
     QRadioButton, QButtonGroup, QListWidget, QListWidgetItem, QLabel,
-    QGroupBox, QSplitter, QSizePolicy
+    QGroupBox, QSplitter, QSizePolicy, QFileDialog, QAbstractItemView
 )
 
 from image_hunter.i18n.i18n import load, t, SUPPORTED
-from image_hunter.core.gallery import clear_gallery, render_items, bind_selection_changed
-from image_hunter.core.models import ImageItem
-from image_hunter.core.mock_data import make_mock_items
-from image_hunter.core.thumbs import ThumbLoader
+from image_hunter.core.gallery import (
+    bind_selection_changed, merge_results, tiles_by_key,
+)
+from image_hunter.core.metrics import METRICS
+from image_hunter.core.models import ImageItem, item_key
 from image_hunter.ui.gallery_delegate import GalleryDelegate
-from image_hunter.ui.preview_dialog import PreviewDialog
 
 class MainWindow(QMainWindow):
     """Main application window (i18n-aware)."""
@@ -31,20 +33,63 @@ class MainWindow(QMainWindow):
         self._build_ui()
         self._apply_texts()
         self._build_language_menu(lang)
+        self._build_metrics_menu()
+        self._build_downloads_menu()
+
+        # thumbnails: background loader is created on first search (see `thumbs`)
+        self._tiles: dict[str, QListWidgetItem] = {}  # item key -> tile (survives reordering)
+        self._thumb_paths: dict[str, tuple[str, str]] = {}  # item key -> (thumbnail url, cached file)
+        self._thumb_errors: dict[str, str] = {}        # item key -> failure reason
+        self._thumbs = None
+
+        # downloads: persistent queue, restored well after first paint (see `downloads`);
+        # a zero timer would still run before the first paint and pull in urllib
+        self._downloads = None
+        self._downloads_dlg = None
+        QTimer.singleShot(1000, self._restore_downloads)
 
-        # thumbnails: background loader + signals
-        self._thumb_paths: dict[int, str] = {}
-        self.thumbs = ThumbLoader(self)
-        self.thumbs.signals.loaded.connect(self._on_thumb_loaded)
-        self.thumbs.signals.failed.connect(self._on_thumb_failed)
+        # Live thumbnail stats (right side of the status bar)
+        self.lbl_thumb_stats = QLabel()
+        self.statusBar().addPermanentWidget(self.lbl_thumb_stats)
 
         # Bind selection for details updates
         bind_selection_changed(self.gallery, self._on_item_selected)
+        self.gallery.itemSelectionChanged.connect(self._on_gallery_selection)
 
         self.statusBar().showMessage(
             t("status.results").format(n=0, scope=t("scope.pd"), ms=0)
         )
 
+    @property
+    def thumbs(self):
+        """Thumbnail loader, built lazily so it stays off the first-paint path."""
+        if self._thumbs is None:
+            from image_hunter.core.thumbs import ThumbLoader
+            self._thumbs = ThumbLoader(self)
+            self._thumbs.signals.results.connect(self._on_thumb_results)
+        return self._thumbs
+
+    @property
+    def downloads(self):
+        """Download queue, built on first use (or at startup if work was left over)."""
+        if self._downloads is None:
+            from image_hunter.core.download_queue import DownloadQueue
+            rate_kbps = int(self.settings.value("download_rate_kbps", 0))
+            self._downloads = DownloadQueue(self, rate_bps=rate_kbps * 1024)
+        return self._downloads
+
+    def _restore_downloads(self) -> None:
+        from image_hunter.core.download_queue import default_state_file
+        if default_state_file().is_file() and self.downloads.has_unfinished():
+            self.downloads.start()
+
+    def closeEvent(self, ev) -> None:
+        # Stop transfers and persist the queue while the event loop still runs;
+        # otherwise the download threads keep the process alive after exit
+        if self._downloads is not None:
+            self._downloads.shutdown()
+        super().closeEvent(ev)
+
     # UI construction
     def _build_ui(self) -> None:
         central = QWidget(self)
@@ -106,6 +151,7 @@ class MainWindow(QMainWindow):
         self.gallery.setMovement(QListWidget.Static)
         self.gallery.setSpacing(10)
         self.gallery.setUniformItemSizes(True)
+        self.gallery.setSelectionMode(QAbstractItemView.ExtendedSelection)
 
         # Set tile size, custom delegate and double-click action
         self.gallery.setGridSize(QSize(170, 190))
@@ -139,7 +185,8 @@ class MainWindow(QMainWindow):
         self.btn_open_source.clicked.connect(self._action_open_source)
         self.btn_open_license.clicked.connect(self._action_open_license)
         self.btn_copy_credit.clicked.connect(self._action_copy_credit)
-        # Download will be implemented later (thumbnail/full image pipeline)
+        # Download queues the originals of every selected tile
+        self.btn_download.clicked.connect(self._action_download)
         self.btn_download.setEnabled(False)
 
         for b in (self.btn_open_source, self.btn_open_license, self.btn_download, self.btn_copy_credit):
@@ -201,6 +248,56 @@ class MainWindow(QMainWindow):
 
         self.lang_group.triggered.connect(self._on_lang_triggered)
 
+    # Metrics menu (export)
+    def _build_metrics_menu(self) -> None:
+        self.metrics_menu = self.menuBar().addMenu(t("menu.metrics"))
+        self.act_export_json = QAction(self)
+        self.act_export_prom = QAction(self)
+        self.act_export_json.triggered.connect(lambda: self._export_metrics("json"))
+        self.act_export_prom.triggered.connect(lambda: self._export_metrics("prom"))
+        self.metrics_menu.addAction(self.act_export_json)
+        self.metrics_menu.addAction(self.act_export_prom)
+        self._apply_metrics_texts()
+
+    def _apply_metrics_texts(self) -> None:
+        self.metrics_menu.setTitle(t("menu.metrics"))
+        self.act_export_json.setText(t("metrics.export_json"))
+        self.act_export_prom.setText(t("metrics.export_prometheus"))
+
+    def _export_metrics(self, fmt: str) -> None:
+        default = "image_hunter_metrics.json" if fmt == "json" else "image_hunter_metrics.prom"
+        path, _ = QFileDialog.getSaveFileName(self, t("menu.metrics"), default)
+        if not path:
+            return
+        text = METRICS.to_json() if fmt == "json" else METRICS.to_prometheus()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    # Downloads menu
+    def _build_downloads_menu(self) -> None:
+        self.downloads_menu = self.menuBar().addMenu(t("menu.downloads"))
+        self.act_show_downloads = QAction(self)
+        self.act_show_downloads.triggered.connect(self._show_downloads)
+        self.downloads_menu.addAction(self.act_show_downloads)
+        self._apply_downloads_texts()
+
+    def _apply_downloads_texts(self) -> None:
+        self.downloads_menu.setTitle(t("menu.downloads"))
+        self.act_show_downloads.setText(t("downloads.show"))
+
+    def _show_downloads(self) -> None:
+        if self._downloads_dlg is None:
+            from image_hunter.ui.downloads_dialog import DownloadsDialog  # only needed on demand
+            rate_kbps = int(self.settings.value("download_rate_kbps", 0))
+            self._downloads_dlg = DownloadsDialog(self, self.downloads, rate_kbps)
+            self._downloads_dlg.rate.valueChanged.connect(self._on_download_rate_changed)
+        self._downloads_dlg.show()
+        self._downloads_dlg.raise_()
+
+    def _on_download_rate_changed(self, kbps: int) -> None:
+        self.settings.setValue("download_rate_kbps", kbps)
+        self.downloads.set_rate(kbps * 1024)
+
     def _on_lang_triggered(self, action: QAction) -> None:
         self._change_language(action.data())
 
@@ -209,6 +306,9 @@ class MainWindow(QMainWindow):
         self.settings.setValue("lang", code)
         self._apply_texts()
         self.lang_menu.setTitle(t("menu.language"))
+        self._apply_metrics_texts()
+        self._apply_downloads_texts()
+        self._update_thumb_stats()
 
     # i18n application
     def _apply_texts(self) -> None:
@@ -244,18 +344,44 @@ class MainWindow(QMainWindow):
 
     # Search + selection
     def _on_search_clicked(self) -> None:
+        from image_hunter.core.mock_data import make_mock_items
+        from image_hunter.core.ranking import TopKRanker
         query = self.search_edit.text().strip()
-        clear_gallery(self.gallery)
-        self._thumb_paths.clear()
-        items = make_mock_items(query, n=18)
-        render_items(self.gallery, items)
-        # schedule thumbnails for all items currently in the list
-        self.thumbs.load_for_list(self.gallery)
+        start = time.perf_counter()
+        with METRICS.timer("search"):
+            items = make_mock_items(query, n=18)
+        with METRICS.timer("render"):
+            # Providers answer independently; merge each batch as it arrives so the
+            # first screen always holds the best results seen so far. Tiles are
+            # diffed by key: results that stay keep their icon and selection.
+            ranker = TopKRanker(query, k=self._first_screen_tiles())
+            removed = merge_results(self.gallery, ranker, _by_provider(items))
+        self._tiles = tiles_by_key(self.gallery)
+        for key in removed:
+            self._thumb_paths.pop(key, None)
+            self._thumb_errors.pop(key, None)
+        # only tiles without a thumbnail of their current URL are loaded
+        # (new ones, earlier failures, or results whose thumbnail_url changed)
+        self.thumbs.forget(removed)
+        self.thumbs.load_items(
+            it for it in items
+            if self._thumb_paths.get(item_key(it), (None, None))[0] != it.thumbnail_url
+        )
+        ms = round((time.perf_counter() - start) * 1000.0)
         scope = t("scope.pd") if self.scope_pd.isChecked() else t("scope.free")
-        self.statusBar().showMessage(t("status.results").format(n=len(items), scope=scope, ms=3))
-        if self.gallery.count() > 0:
+        self.statusBar().showMessage(t("status.results").format(n=len(items), scope=scope, ms=ms))
+        self._update_thumb_stats()
+        if self.gallery.count() > 0 and self.gallery.currentItem() is None:
             self.gallery.setCurrentRow(0)
 
+    def _first_screen_tiles(self) -> int:
+        """How many tiles fit in the visible gallery area (plus one row of slack)."""
+        grid = self.gallery.gridSize()
+        vp = self.gallery.viewport().size()
+        cols = max(1, vp.width() // max(1, grid.width()))
+        rows = max(1, vp.height() // max(1, grid.height())) + 1
+        return cols * rows
+
     def _on_item_selected(self, item: ImageItem | None) -> None:
         self._current_item = item
         if not item:
@@ -276,20 +402,21 @@ class MainWindow(QMainWindow):
         for b in (self.btn_open_source, self.btn_open_license, self.btn_copy_credit):
             b.setEnabled(True)
 
-    def _on_thumb_loaded(self, index: int, path: str) -> None:
-        # Set the loaded image as the icon for the given item index
-        item = self.gallery.item(index)
-        if not item:
-            return
-        px = QPixmap(path)
-        if not px.isNull():
-            item.setIcon(px)  # QListWidgetItem accepts QPixmap directly
+    def _selected_models(self) -> list[ImageItem]:
+        return [li.data(Qt.UserRole) for li in self.gallery.selectedItems() if li.data(Qt.UserRole) is not None]
 
-    def _on_thumb_failed(self, index: int, reason: str) -> None:
-        # Keep the placeholder
-        pass
+    def _on_gallery_selection(self) -> None:
+        self.btn_download.setEnabled(bool(self.gallery.selectedItems()))
+
+    # Actions (open/copy/download)
+    def _action_download(self) -> None:
+        models = self._selected_models()
+        if not models:
+            return
+        added = self.downloads.add_items(models)
+        self.statusBar().showMessage(t("status.queued").format(n=len(added)), 5000)
+        self._show_downloads()
 
-    # Actions (open/copy)
     def _action_open_source(self) -> None:
         if self._current_item:
             QDesktopServices.openUrl(QUrl(self._current_item.source_url))
@@ -304,26 +431,62 @@ class MainWindow(QMainWindow):
             # Use QApplication clipboard
             from PySide6.QtWidgets import QApplication
             QApplication.clipboard().setText(self._current_item.credit_text or "")
-    def _on_thumb_loaded(self, index: int, path: str) -> None:
-        # Set the loaded image as the icon for the given item index
-        item = self.gallery.item(index)
+
+    def _on_thumb_results(self, loaded: list, failed: list) -> None:
+        # One batch per frame: repaint the gallery once for the whole batch
+        self.gallery.setUpdatesEnabled(False)
+        try:
+            for key, url, path, image in loaded:
+                self._on_thumb_loaded(key, url, path, image)
+            for key, reason in failed:
+                self._on_thumb_failed(key, reason)
+        finally:
+            self.gallery.setUpdatesEnabled(True)
+        self._update_thumb_stats()
+
+    def _on_thumb_loaded(self, key: str, url: str, path: str, image: QImage) -> None:
+        # Set the loaded image (already decoded/downscaled off-thread) as the item icon
+        item = self._tiles.get(key)
         if not item:
             return
-        px = QPixmap(path)
-        if not px.isNull():
-            # Using QIcon is more robust across bindings
-            from PySide6.QtGui import QIcon
-            item.setIcon(QIcon(px))
-            self._thumb_paths[index] = path  # keep for preview
-
-    def _on_thumb_failed(self, index: int, reason: str) -> None:
-        # Keep the placeholder; could log 'reason' if needed
-        pass
+        # Using QIcon is more robust across bindings
+        item.setIcon(QIcon(QPixmap.fromImage(image)))
+        self._thumb_paths[key] = (url, path)  # keep for preview (and to spot URL changes)
+        if self._thumb_errors.pop(key, None) is not None:
+            item.setToolTip(item.data(Qt.UserRole).tooltip_text())  # retry succeeded
+
+    def _on_thumb_failed(self, key: str, reason: str) -> None:
+        # Keep the placeholder; the reason is kept for the tooltip/stats
+        self._thumb_errors[key] = reason
+        item = self._tiles.get(key)
+        if item is not None:
+            model = item.data(Qt.UserRole)
+            base = model.tooltip_text() if model is not None else ""
+            item.setToolTip(f"{base}\n{t('thumb.failed').format(reason=reason)}".strip())
+
+    def _update_thumb_stats(self) -> None:
+        net = METRICS.stage("network")
+        self.lbl_thumb_stats.setText(t("status.thumbs").format(
+            ok=len(self._thumb_paths),
+            total=self.gallery.count(),
+            failed=len(self._thumb_errors),
+            p50=round(net.percentile(0.5)),
+            p95=round(net.percentile(0.95)),
+        ))
 
     def _on_item_double_clicked(self, list_item):
         # Open preview dialog using the cached thumbnail if present
-        row = self.gallery.row(list_item)
         model = list_item.data(Qt.UserRole)
-        path = self._thumb_paths.get(row)  # May be None (dialog shows "No preview available")
-        dlg = PreviewDialog(self, model, path)
-        dlg.exec()
\ No newline at end of file
+        _, path = self._thumb_paths.get(item_key(model), (None, None))  # May be None (dialog shows "No preview available")
+        original = self._downloads.local_path(model.image_url) if self._downloads is not None else None
+        from image_hunter.ui.preview_dialog import PreviewDialog  # only needed on demand
+        dlg = PreviewDialog(self, model, path, str(original) if original else None)
+        dlg.exec()
+
+
+def _by_provider(items: list[ImageItem]) -> list[list[ImageItem]]:
+    """Split results into per-provider batches, in order of first arrival."""
+    batches: dict[object, list[ImageItem]] = {}
+    for it in items:
+        batches.setdefault(it.source, []).append(it)
+    return list(batches.values())
@@ -1,54 +1,94 @@
 from __future__ import annotations
 
 from pathlib import Path
-from PySide6.QtCore import Qt, QUrl, QSize
-from PySide6.QtGui import QPixmap
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QHBoxLayout, QPushButton, QSizePolicy
+from PySide6.QtCore import QUrl, Signal
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel
 from PySide6.QtGui import QDesktopServices
 
+from image_hunter.core.download import fetch_cached
+from image_hunter.core.executors import io_executor
+from image_hunter.core.thumbs import ORIGINALS_DIR, cached_path, ensure_cache_dir
+from image_hunter.ui.zoom_view import TiledImageView
+
 
 class PreviewDialog(QDialog):
-    """Simple image preview dialog (uses cached thumbnail for now)."""
+    """Image preview dialog: zoom/pan over the original (or the cached thumbnail until it is loaded)."""
+
+    _original_ready = Signal(str)    # worker -> UI: local path of the original
+    _original_failed = Signal(str)   # worker -> UI: reason
 
-    def __init__(self, parent, item, thumb_path: str | None) -> None:
+    def __init__(self, parent, item, thumb_path: str | None, original_path: str | None = None) -> None:
         super().__init__(parent)
         self.setWindowTitle(item.title or "Preview")
         self._item = item
-        self._orig_pix = QPixmap(thumb_path) if thumb_path and Path(thumb_path).is_file() else QPixmap()
-        self._img = QLabel(alignment=Qt.AlignCenter)
-        self._img.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self._view = TiledImageView()
+        self._status = QLabel()
 
         # Buttons
+        self._btn_original = QPushButton("Load original")
         btn_open = QPushButton("Open in source")
         btn_license = QPushButton("License page")
         btn_close = QPushButton("Close")
 
+        self._btn_original.clicked.connect(self._load_original)
         btn_open.clicked.connect(lambda: QDesktopServices.openUrl(QUrl(item.source_url)))
         btn_license.clicked.connect(lambda: QDesktopServices.openUrl(QUrl(item.license_url)))
         btn_close.clicked.connect(self.accept)
+        self._original_ready.connect(self._show_original)
+        self._original_failed.connect(self._on_original_failed)
+        self._view.failed.connect(self._status.setText)  # e.g. an original too large to decode
 
         # Layout
         lay = QVBoxLayout(self)
-        lay.addWidget(self._img, 1)
+        lay.addWidget(self._view, 1)
 
         bar = QHBoxLayout()
+        bar.addWidget(self._status)
         bar.addStretch(1)
+        bar.addWidget(self._btn_original)
         bar.addWidget(btn_open)
         bar.addWidget(btn_license)
         bar.addWidget(btn_close)
         lay.addLayout(bar)
 
         self.resize(900, 700)
-        self._rescale()
 
-    def resizeEvent(self, ev) -> None:  # Scale on resize
-        super().resizeEvent(ev)
-        self._rescale()
+        # Prefer a local original (download queue or an earlier "Load original")
+        cached = cached_path(item.image_url, ORIGINALS_DIR) if item.image_url else None
+        original = original_path or (str(cached) if cached is not None and cached.is_file() else None)
+        if original and Path(original).is_file() and self._view.set_source(original):
+            self._btn_original.hide()
+        else:
+            self._view.set_source(thumb_path if thumb_path and Path(thumb_path).is_file() else None)
+            self._btn_original.setEnabled(bool(item.image_url))
+
+    def _load_original(self) -> None:
+        path = cached_path(self._item.image_url, ORIGINALS_DIR)
+        if io_executor().try_submit(self._fetch_original, self._item.image_url, path) is None:
+            self._status.setText("Busy, try again in a moment")
+            return
+        self._btn_original.setEnabled(False)
+        self._status.setText("Loading original…")
+
+    def _fetch_original(self, url: str, path: Path) -> None:
+        # I/O worker
+        try:
+            ensure_cache_dir(path.parent)
+            # Other windows/instances asking for the same original wait for this one
+            fetch_cached(url, path, lock_timeout=300.0, timeout=30.0, max_bytes=200_000_000,
+                         user_agent="ImageHunter/0.1 (preview)")
+        except Exception as e:  # network errors, size guard, etc.
+            self._original_failed.emit(str(e))
+            return
+        self._original_ready.emit(str(path))
 
-    def _rescale(self) -> None:
-        if not self._orig_pix.isNull():
-            # Fit-to-window while preserving aspect ratio
-            size = self._img.size().boundedTo(QSize(max(100, self.width()-40), max(100, self.height()-140)))
-            self._img.setPixmap(self._orig_pix.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    def _show_original(self, path: str) -> None:
+        if self._view.set_source(path):
+            self._status.setText("")
+            self._btn_original.hide()
         else:
-            self._img.setText("No preview available")
+            self._on_original_failed("Could not read image")
+
+    def _on_original_failed(self, reason: str) -> None:
+        self._status.setText(reason)
+        self._btn_original.setEnabled(True)
@@ -0,0 +1,420 @@
+from __future__ import annotations
+
+import atexit
+import math
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import List, Optional, Tuple
+
+from PySide6.QtCore import QObject, QPointF, QRect, QRectF, QSize, Qt, QTimer, Signal
+from PySide6.QtGui import QColor, QImage, QImageIOHandler, QImageReader, QPainter, QPixmap
+from PySide6.QtWidgets import QWidget
+
+from image_hunter.core.executors import cpu_executor
+from image_hunter.core.thumbs import image_from_raw, image_to_raw
+
+TileKey = Tuple[int, int, int, int]   # generation, level, column, row (level -1 = overview)
+
+TILE = 512            # tile edge in level pixels (fewer, larger decodes: JPEG clip cost grows with the row)
+OVERVIEW_SIDE = 1024  # longest side of the always-available low-res overview
+MAX_DECODE_MB = 1024  # largest full-size decode allowed when a pyramid has to be built
+
+# One full-size decode at a time keeps peak memory bounded while building pyramids
+_build_lock = threading.Lock()
+
+
+def decode_region(path: str, src: QRect, out: QSize) -> QImage:
+    """Decode only `src` (full-res coordinates) of an image file, scaled to `out`."""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    reader.setClipRect(src)      # applied first...
+    reader.setScaledSize(out)    # ...then scaled (JPEG decodes at reduced DCT size)
+    return reader.read()
+
+
+def _decode_region_raw(path: str, src: QRect, out: QSize) -> Optional[tuple]:
+    # Process-pool variant of decode_region (module level and picklable both ways)
+    return image_to_raw(decode_region(path, src, out))
+
+
+def supports_regions(path: str) -> bool:
+    """True if the format's reader clips and scales while decoding (JPEG), not after."""
+    reader = QImageReader(path)
+    return reader.supportsOption(QImageIOHandler.ClipRect) and reader.supportsOption(QImageIOHandler.ScaledSize)
+
+
+def overview_size(size: QSize) -> QSize:
+    f = min(1.0, OVERVIEW_SIDE / max(size.width(), size.height()))
+    return QSize(max(1, round(size.width() * f)), max(1, round(size.height() * f)))
+
+
+def tile_file(out_dir: str, level: int, col: int, row: int) -> str:
+    return os.path.join(out_dir, f"{level}_{col}_{row}.png")
+
+
+def build_pyramid(path: str, out_dir: str, levels: int) -> bool:
+    """
+    Decode `path` once and write its tiles (tile_file() per level) plus
+    overview.png into `out_dir`, for formats that can only be decoded whole.
+    Module level, so it also runs on a process pool.
+    """
+    with _build_lock:
+        reader = QImageReader(path)
+        size = reader.size()
+        need_mb = size.width() * size.height() * 4 // (1024 * 1024) + 1
+        if not size.isValid() or need_mb > MAX_DECODE_MB:
+            return False
+        limit = QImageReader.allocationLimit()
+        QImageReader.setAllocationLimit(max(limit, need_mb + 1))  # Qt's default 256 MB cap
+        try:
+            img = reader.read()
+        finally:
+            QImageReader.setAllocationLimit(limit)
+        if img.isNull():
+            return False
+        if not img.scaled(overview_size(size), Qt.IgnoreAspectRatio, Qt.SmoothTransformation).save(
+                os.path.join(out_dir, "overview.png")):
+            return False
+        for level in range(levels):
+            if level:
+                scale = 2 ** level
+                img = img.scaled(max(1, math.ceil(size.width() / scale)), max(1, math.ceil(size.height() / scale)),
+                                 Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            for row in range(math.ceil(img.height() / TILE)):
+                for col in range(math.ceil(img.width() / TILE)):
+                    tile = img.copy(col * TILE, row * TILE, TILE, TILE)
+                    if not tile.save(tile_file(out_dir, level, col, row), "PNG", 90):  # light compression
+                        return False
+        return True
+
+
+# Pyramid directories of live views; removed with their view or at exit
+_LIVE_DIRS: List[str] = []
+
+
+def _remove_dirs(dirs: List[str]) -> None:
+    for d in list(dirs):
+        shutil.rmtree(d, ignore_errors=True)
+        if d in _LIVE_DIRS:
+            _LIVE_DIRS.remove(d)
+    dirs.clear()
+
+
+atexit.register(_remove_dirs, _LIVE_DIRS)
+
+
+class _TileSignals(QObject):
+    ready = Signal(object, QImage)   # TileKey, decoded image
+    built = Signal(int, str, bool)   # generation, pyramid directory, success
+
+
+class TiledImageView(QWidget):
+    """
+    Zoom/pan viewer for very large images.
+
+    The image is split into a pyramid: level L is the image scaled by 1/2**L and
+    cut into TILE x TILE tiles. Only tiles intersecting the viewport at the
+    current level are decoded (on the CPU pool), and decoded tiles live in an
+    LRU of `max_tiles`, so memory stays bounded regardless of image size. A
+    low-res overview is drawn underneath while tiles arrive.
+
+    JPEG tiles come straight from the file (QImageReader clip + scaled size
+    decode only that region). Other formats can only be decoded whole, so the
+    pyramid is built once in the background into a temporary directory and
+    tiles are read from there. `failed` is emitted if the image can't be shown.
+
+    Mouse wheel zooms around the cursor, drag pans, double-click toggles
+    between fit-to-window and 100%.
+    """
+    failed = Signal(str)   # reason the current source can't be shown
+
+    def __init__(self, parent: Optional[QWidget] = None, max_tiles: int = 48) -> None:
+        super().__init__(parent)
+        self.setMouseTracking(False)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.max_tiles = max_tiles
+        self._signals = _TileSignals()
+        self._signals.ready.connect(self._on_ready)
+        self._signals.built.connect(self._on_built)
+        self._path: Optional[str] = None
+        self._native = True                 # tiles decode straight from _path
+        self._pyramid: Optional[str] = None  # built pyramid directory (non-native formats)
+        self._dirs: List[str] = []          # pyramid directories to delete with the widget
+        self.destroyed.connect(partial(_remove_dirs, self._dirs))
+        self._size = QSize()
+        self._levels = 1
+        self._gen = 0
+        self._tiles: "OrderedDict[TileKey, QPixmap]" = OrderedDict()
+        self._pending: set[TileKey] = set()
+        self._overview: Optional[QPixmap] = None
+        self._zoom = 1.0            # screen px per image px
+        self._offset = QPointF()    # image coordinate at the widget's top-left
+        self._fit = True
+        self._drag: Optional[QPointF] = None
+        self._placeholder = ""
+
+    # Source
+    def set_source(self, path: Optional[str], placeholder: str = "No preview available") -> bool:
+        """Show `path` (False if it can't be read; the placeholder text is shown instead)."""
+        self._gen += 1
+        self._tiles.clear()
+        self._pending.clear()
+        self._overview = None
+        self._pyramid = None
+        _remove_dirs(self._dirs)
+        self._placeholder = placeholder
+        size = QImageReader(path).size() if path else QSize()
+        if not size.isValid() or size.isEmpty():
+            self._path, self._size = None, QSize()
+            self.update()
+            return False
+        self._path, self._size = path, size
+        self._levels = max(1, math.ceil(math.log2(max(size.width(), size.height()) / TILE)) + 1)
+        self._native = supports_regions(path)
+        self._fit = True
+        self._fit_to_window()
+        if self._native:
+            self._request(self._overview_key())
+        else:
+            self._start_build(self._gen)
+        self.update()
+        return True
+
+    def _start_build(self, gen: int) -> None:
+        if gen != self._gen:
+            return
+        out_dir = tempfile.mkdtemp(prefix="ih-pyramid-")
+        fut = cpu_executor().try_submit(build_pyramid, self._path, out_dir, self._levels)
+        if fut is None:
+            shutil.rmtree(out_dir, ignore_errors=True)
+            QTimer.singleShot(30, partial(self._start_build, gen))  # CPU pool is full
+            return
+        self._dirs.append(out_dir)
+        _LIVE_DIRS.append(out_dir)
+        signals = self._signals
+        fut.add_done_callback(
+            lambda f: signals.built.emit(gen, out_dir, not f.cancelled() and f.exception() is None and f.result()))
+
+    def _on_built(self, gen: int, out_dir: str, ok: bool) -> None:
+        if gen != self._gen:
+            return  # directory was already removed by set_source()
+        if not ok:
+            self._fail("Could not read image")
+            return
+        self._pyramid = out_dir
+        self._request(self._overview_key())
+        self.update()
+
+    def _fail(self, reason: str) -> None:
+        self._gen += 1
+        self._tiles.clear()
+        self._pending.clear()
+        self._overview = None
+        self._path, self._size = None, QSize()
+        self._placeholder = reason
+        self.update()
+        self.failed.emit(reason)
+
+    @property
+    def image_size(self) -> QSize:
+        return QSize(self._size)
+
+    @property
+    def zoom(self) -> float:
+        return self._zoom
+
+    # Geometry
+    def _fit_zoom(self) -> float:
+        if self._size.isEmpty():
+            return 1.0
+        return min(1.0, self.width() / self._size.width(), self.height() / self._size.height())
+
+    def _fit_to_window(self) -> None:
+        self._zoom = self._fit_zoom()
+        self._center()
+
+    def _center(self) -> None:
+        # Center the image when it is smaller than the viewport, otherwise clamp panning
+        w, h = self._size.width() * self._zoom, self._size.height() * self._zoom
+        ox, oy = self._offset.x(), self._offset.y()
+        if w <= self.width():
+            ox = (w - self.width()) / 2 / self._zoom
+        else:
+            ox = min(max(0.0, ox), self._size.width() - self.width() / self._zoom)
+        if h <= self.height():
+            oy = (h - self.height()) / 2 / self._zoom
+        else:
+            oy = min(max(0.0, oy), self._size.height() - self.height() / self._zoom)
+        self._offset = QPointF(ox, oy)
+
+    def set_zoom(self, zoom: float, anchor: Optional[QPointF] = None) -> None:
+        """Zoom to `zoom` (screen px per image px), keeping `anchor` (widget coords) fixed."""
+        if self._path is None:
+            return
+        zoom = min(8.0, max(self._fit_zoom() * 0.5, zoom))
+        anchor = anchor if anchor is not None else QPointF(self.width() / 2, self.height() / 2)
+        img_pt = self._offset + anchor / self._zoom
+        self._zoom = zoom
+        self._offset = img_pt - anchor / zoom
+        self._fit = False
+        self._center()
+        self.update()
+
+    def _level(self) -> int:
+        # Coarsest level that still has at least one level pixel per screen pixel
+        if self._zoom >= 1.0:
+            return 0
+        return min(self._levels - 1, int(math.floor(math.log2(1.0 / self._zoom))))
+
+    # Tiles
+    def _tile_src(self, level: int, col: int, row: int) -> Tuple[QRect, QSize]:
+        scale = 2 ** level
+        x, y = col * TILE * scale, row * TILE * scale
+        w = min(TILE * scale, self._size.width() - x)
+        h = min(TILE * scale, self._size.height() - y)
+        return QRect(x, y, w, h), QSize(max(1, math.ceil(w / scale)), max(1, math.ceil(h / scale)))
+
+    def _overview_key(self) -> TileKey:
+        return (self._gen, -1, 0, 0)
+
+    def _request(self, key: TileKey) -> None:
+        if key in self._pending:
+            return
+        if key[1] < 0:
+            src = QRect(0, 0, self._size.width(), self._size.height())
+            out = overview_size(self._size)
+        else:
+            src, out = self._tile_src(key[1], key[2], key[3])
+        path = self._path
+        if not self._native:
+            if self._pyramid is None:
+                return  # still building; _on_built() asks again
+            # Pyramid files are already at level resolution: read them whole
+            path = os.path.join(self._pyramid, "overview.png") if key[1] < 0 else tile_file(self._pyramid, *key[1:])
+            src = QRect(0, 0, out.width(), out.height())
+        cpu = cpu_executor()
+        if cpu.processes:
+            # Bound methods of a widget can't be pickled: run the module-level task
+            # and bring the pixels back through the done callback
+            fut = cpu.try_submit(_decode_region_raw, path, src, out)
+            if fut is not None:
+                fut.add_done_callback(lambda f, key=key: self._decoded_raw(key, f))
+        else:
+            fut = cpu.try_submit(self._decode, key, path, src, out)
+        if fut is not None:
+            self._pending.add(key)
+        else:
+            QTimer.singleShot(30, self.update)  # CPU pool is full; ask again on the next paint
+
+    def _decode(self, key: TileKey, path: str, src: QRect, out: QSize) -> None:
+        # CPU worker: stale requests (new image) are dropped without decoding
+        if key[0] != self._gen:
+            return
+        self._signals.ready.emit(key, decode_region(path, src, out))
+
+    def _decoded_raw(self, key: TileKey, fut) -> None:
+        # Process-pool result (pool thread): failures arrive as a null image, so the key leaves _pending
+        try:
+            img = image_from_raw(fut.result())
+        except Exception:
+            img = QImage()
+        self._signals.ready.emit(key, img)
+
+    def _on_ready(self, key: TileKey, img: QImage) -> None:
+        self._pending.discard(key)
+        if key[0] != self._gen:
+            return
+        if img.isNull():
+            if key[1] < 0:
+                self._fail("Could not read image")  # nothing else would decode either
+            return
+        if key[1] < 0:
+            self._overview = QPixmap.fromImage(img)
+        else:
+            self._tiles[key] = QPixmap.fromImage(img)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+        self.update()
+
+    def _visible_tiles(self, level: int):
+        scale = 2 ** level
+        x0, y0 = max(0.0, self._offset.x()), max(0.0, self._offset.y())
+        x1 = min(self._size.width(), self._offset.x() + self.width() / self._zoom)
+        y1 = min(self._size.height(), self._offset.y() + self.height() / self._zoom)
+        span = TILE * scale
+        for row in range(int(y0 // span), int(math.ceil(y1 / span))):
+            for col in range(int(x0 // span), int(math.ceil(x1 / span))):
+                yield col, row
+
+    def _to_screen(self, r: QRect) -> QRectF:
+        return QRectF((r.x() - self._offset.x()) * self._zoom, (r.y() - self._offset.y()) * self._zoom,
+                      r.width() * self._zoom, r.height() * self._zoom)
+
+    # Qt events
+    def paintEvent(self, _ev) -> None:
+        p = QPainter(self)
+        p.fillRect(self.rect(), QColor("#0E1114"))
+        if self._path is None:
+            p.setPen(QColor("#D7DBDF"))
+            p.drawText(self.rect(), Qt.AlignCenter, self._placeholder)
+            return
+        p.setRenderHint(QPainter.SmoothPixmapTransform, True)
+        full = QRect(0, 0, self._size.width(), self._size.height())
+        if self._overview is not None:
+            p.drawPixmap(self._to_screen(full), self._overview, QRectF(self._overview.rect()))
+
+        # Overview is enough while it has at least as many pixels as the screen shows
+        if self._overview is not None and self._overview.width() >= self._size.width() * self._zoom:
+            return
+        level = self._level()
+        for col, row in self._visible_tiles(level):
+            key = (self._gen, level, col, row)
+            px = self._tiles.get(key)
+            if px is None:
+                self._request(key)
+                continue
+            self._tiles.move_to_end(key)  # LRU touch
+            src, _ = self._tile_src(level, col, row)
+            p.drawPixmap(self._to_screen(src), px, QRectF(px.rect()))
+
+    def resizeEvent(self, ev) -> None:
+        super().resizeEvent(ev)
+        if self._fit:
+            self._fit_to_window()
+        else:
+            self._center()
+
+    def wheelEvent(self, ev) -> None:
+        steps = ev.angleDelta().y() / 120.0
+        if steps:
+            self.set_zoom(self._zoom * (1.25 ** steps), ev.position())
+
+    def mousePressEvent(self, ev) -> None:
+        if ev.button() == Qt.LeftButton:
+            self._drag = ev.position()
+            self.setCursor(Qt.ClosedHandCursor)
+
+    def mouseMoveEvent(self, ev) -> None:
+        if self._drag is not None:
+            delta = ev.position() - self._drag
+            self._drag = ev.position()
+            self._offset -= delta / self._zoom
+            self._fit = False
+            self._center()
+            self.update()
+
+    def mouseReleaseEvent(self, _ev) -> None:
+        self._drag = None
+        self.unsetCursor()
+
+    def mouseDoubleClickEvent(self, ev) -> None:
+        if self._fit or abs(self._zoom - self._fit_zoom()) < 1e-6:
+            self.set_zoom(1.0, ev.position())
+        else:
+            self._fit = True
+            self._fit_to_window()
+            self.update()